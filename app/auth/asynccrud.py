@@ -0,0 +1,63 @@
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.models import User,OAuthAccount
+from datetime import datetime, timezone
+from fastapi import HTTPException,status
+from app.utils.usernameUtil import username_allocator
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def get_user_email(db:AsyncSession,email:str):
+    return await db.scalar(select(User).filter(User.email==email))
+
+async def get_user_oauth(db:AsyncSession,provider:str,provider_user_id:str):
+    return await db.scalar(select(User).join(OAuthAccount,OAuthAccount.user_id==User.id)
+                           .filter(OAuthAccount.provider==provider,OAuthAccount.provider_user_id==provider_user_id))
+
+async def link_oauth_account(db:AsyncSession,user_id:int,provider:str,provider_user_id:str):
+    exist=await db.scalar(select(OAuthAccount).filter(OAuthAccount.user_id==user_id,OAuthAccount.provider==provider))
+    if exist:
+        exist.provider_user_id=provider_user_id
+        exist.updated_at=datetime.now(timezone.utc)
+        await db.commit()
+        return exist
+    oauth_account=OAuthAccount(user_id=user_id,provider=provider,provider_user_id=provider_user_id,
+                               created_at=datetime.now(timezone.utc))
+    db.add(oauth_account)
+    await db.commit()
+    return oauth_account
+
+async def create_oauth_user(db:AsyncSession,email:str,username:str,provider:str,provider_user_id:str,attempts:int=3):
+    for attempt in range(attempts):
+        allocated=None
+        try:
+            allocated=await username_allocator.allocate_async(db,username,email)
+            db_user = User(email=email,password=None, username=allocated,created_at=datetime.now(timezone.utc),
+                           is_active=True,is_verified=True)
+            db.add(db_user)
+            await db.flush()
+            oauth_account = OAuthAccount(user_id=db_user.id,provider=provider,provider_user_id=provider_user_id,
+                                         created_at=datetime.now(timezone.utc))
+            db.add(oauth_account)
+            await db.commit()
+            return db_user
+        except IntegrityError as e:
+            await db.rollback()
+            if 'username' not in str(e.orig).lower():
+                logger.error(f"Unexpected IntegrityError during OAuth user creation: {e}")
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Account creation failed.")
+        finally:
+            if allocated is not None:
+                await username_allocator.release_async(allocated)
+    logger.error(f"Failed to allocate a unique username for: {username}")
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail="Unable to generate unique username.")
+
+async def get_user_oauth_account(db:AsyncSession,user_id:int):
+    return (await db.scalars(select(OAuthAccount).filter(OAuthAccount.user_id==user_id))).all()
+
+async def unlink_oauth_account(db:AsyncSession,user_id:int,provider:str):
+    result=await db.execute(delete(OAuthAccount).filter(OAuthAccount.user_id==user_id,OAuthAccount.provider==provider))
+    await db.commit()
+    return result.rowcount > 0
@@ -1,11 +1,16 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import text
 from app.auth.models import User,TokenBlackList,OTP,OAuthAccount,Profile
 from app.auth.schemas import UserCreate
 from datetime import datetime, timezone, timedelta
 from random import randint
 from typing import Optional
 from fastapi import HTTPException,status
+from app.utils.userCacheUtil import user_cache
+from app.utils.usernameUtil import username_allocator
+from app.utils.revocationUtil import revocation_store
+import jwt as pyjwt
 import logging
 
 logger=logging.getLogger(__name__)
@@ -46,32 +51,31 @@ def delete_otp_email(db:Session, email:str, purpose:str):
     db.commit()
     return delete
 
-def create_oauth_user(db:Session,email:str,username:str,provider:str,provider_user_id:str):
-    original=username
-    counter=1
-    while True:
+def create_oauth_user(db:Session,email:str,username:str,provider:str,provider_user_id:str,attempts:int=3):
+    for attempt in range(attempts):
+        allocated=None
         try:
-            db_user = User(email=email,password=None, username=username,created_at=datetime.now(timezone.utc),
+            allocated=username_allocator.allocate(db,username,email)
+            db_user = User(email=email,password=None, username=allocated,created_at=datetime.now(timezone.utc),
                            is_active=True,is_verified=True)
             db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
+            db.flush()
             oauth_account = OAuthAccount(user_id=db_user.id,provider=provider,provider_user_id=provider_user_id,
                                          created_at=datetime.now(timezone.utc))
             db.add(oauth_account)
             db.commit()
+            db.refresh(db_user)
             return db_user
         except IntegrityError as e:
             db.rollback()
-            if 'username' in str(e.orig).lower() or 'UserName' in str(e.orig):
-                username = f"{original}{counter}"
-                counter += 1
-                if counter > 100:
-                    logger.error(f"Failed to generate unique username after 100 attempts for: {original}")
-                    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail="Unable to generate unique username.")
-            else:
+            if 'username' not in str(e.orig).lower():
                 logger.error(f"Unexpected IntegrityError during OAuth user creation: {e}")
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Account creation failed.")
+        finally:
+            if allocated is not None:
+                username_allocator.release(allocated)
+    logger.error(f"Failed to allocate a unique username for: {username}")
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail="Unable to generate unique username.")
 
 def get_user_oauth(db:Session,provider:str,provider_user_id:str):
     oauth_account=db.query(OAuthAccount).filter(OAuthAccount.provider==provider,OAuthAccount.provider_user_id==provider_user_id).first()
@@ -108,6 +112,11 @@ def get_user_oauth_account(db:Session,user_id:int):
 def get_user_email(db:Session,email:str):
     return db.query(User).filter(User.email==email).first()
 
+def get_user_ids_by_email(db:Session,emails:list)->dict:
+    if not emails:
+        return {}
+    return {email:id for id,email in db.query(User.id,User.email).filter(User.email.in_(emails)).all()}
+
 def get_user_id(db:Session,id:int):
     return db.query(User).filter(User.id==id,User.is_active==True).first()
 
@@ -123,6 +132,7 @@ def update_password(db:Session,email:str,password:str):
         user.password=password
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.id)
     return user
 
 def update_password_id(db:Session,id:int,password:str):
@@ -131,6 +141,7 @@ def update_password_id(db:Session,id:int,password:str):
         user.password=password
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.id)
     return user
 
 def deactivate_user(db:Session,email:str):
@@ -139,6 +150,7 @@ def deactivate_user(db:Session,email:str):
         user.is_active=False
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.id)
     return user
 
 def reactivate_user(db:Session,email:str):
@@ -147,6 +159,7 @@ def reactivate_user(db:Session,email:str):
         user.is_active=True
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.id)
     return user
 
 def delete_user(db:Session,id:int):
@@ -154,6 +167,7 @@ def delete_user(db:Session,id:int):
     if user:
         db.delete(user)
         db.commit()
+        user_cache.invalidate(id)
         return True
     return False
 
@@ -163,6 +177,7 @@ def verify_email(db:Session,email:str):
         user.is_verified=True
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.id)
     return user
 
 def add_token_blacklist(db:Session,token:str):
@@ -176,11 +191,45 @@ def token_blacklisted(db:Session,token:str):
     result=db.query(TokenBlackList).filter(TokenBlackList.token==token).first()
     return result is not None
 
-def clear_blacklist(db:Session,days:int=30):
-    expiry=datetime.now(timezone.utc)-timedelta(days=days)
-    delete=db.query(TokenBlackList).filter(TokenBlackList.blacklisted_at<expiry).delete()
+def has_blacklisted_tokens(db:Session)->bool:
+    return db.query(TokenBlackList.id).first() is not None
+
+def replay_blacklist(db:Session,after_id:int,batch_size:int=1000)->tuple:
+    rows=db.query(TokenBlackList).filter(TokenBlackList.id>after_id).order_by(TokenBlackList.id).limit(batch_size).all()
+    last_id=rows[-1].id if rows else after_id
+    now=datetime.now(timezone.utc).timestamp()
+    replayed=[]
+    for row in rows:
+        try:
+            claims=pyjwt.decode(row.token,options={"verify_signature":False})
+        except pyjwt.InvalidTokenError:
+            replayed.append(row.id)
+            continue
+        if claims.get("exp",0)<=now or (claims.get("jti") and revocation_store.revoke(claims["jti"],claims["exp"])):
+            replayed.append(row.id)
+    if replayed:
+        db.query(TokenBlackList).filter(TokenBlackList.id.in_(replayed)).delete(synchronize_session=False)
     db.commit()
-    return delete
+    return (last_id,len(rows),len(replayed))
+
+def _delete_batch(db:Session,table:str,where:str,batch_size:int,**params)->int:
+    result=db.execute(text(f'DELETE FROM "{table}" WHERE ctid = ANY(ARRAY(SELECT ctid FROM "{table}" WHERE {where} LIMIT :batch_size))'),
+                      {"batch_size":batch_size,**params})
+    db.commit()
+    return result.rowcount
+
+def clear_blacklist(db:Session,days:int=30,batch_size:int=1000)->int:
+    expiry=datetime.now(timezone.utc)-timedelta(days=days)
+    return _delete_batch(db,TokenBlackList.__tablename__,"blacklisted_at < :expiry",batch_size,expiry=expiry)
+
+def delete_expired_otps(db:Session,batch_size:int=1000)->int:
+    return _delete_batch(db,OTP.__tablename__,"expires_at < :now AND (locked_until IS NULL OR locked_until < :now)",
+                         batch_size,now=datetime.now(timezone.utc))
+
+def delete_stale_unverified_users(db:Session,days:int,batch_size:int=1000)->int:
+    expiry=datetime.now(timezone.utc)-timedelta(days=days)
+    return _delete_batch(db,User.__tablename__,"is_verified = false AND created_at < :expiry AND NOT EXISTS "
+                         "(SELECT 1 FROM oauth_accounts WHERE oauth_accounts.user_id = users.id)",batch_size,expiry=expiry)
 
 def is_otp_locked(db:Session,email:str,purpose:str)->tuple:
     locked = db.query(OTP).filter(OTP.email==email,OTP.purpose==purpose,OTP.locked_until.isnot(None),
@@ -191,7 +240,7 @@ def is_otp_locked(db:Session,email:str,purpose:str)->tuple:
         return (True,remaining_minutes)
     return (False,0)
 
-def create_otp(db:Session,email:str,purpose:str):
+def create_otp(db:Session,email:str,purpose:str,notify=None):
     is_locked,remaining_minutes=is_otp_locked(db,email,purpose)
     if is_locked:
         return None 
@@ -207,17 +256,20 @@ def create_otp(db:Session,email:str,purpose:str):
     db_otp = OTP(user_id=user.id,email=email,otp_code=str(otp_code),purpose=purpose,created_at=created_at,
                  expires_at=expires_at,failed_attempt=0,max_attempt=5,locked_until=None)
     db.add(db_otp)
+    if notify:
+        notify(str(otp_code))
     db.commit()
     db.refresh(db_otp)
     return str(otp_code)
    
 def verify_and_delete_otp(db:Session,email:str,otp:str,purpose:str ):
-    db.query(OTP).filter(OTP.expires_at<datetime.now(timezone.utc)).delete()
-    db.commit()
-    db_otp = db.query(OTP).filter(OTP.email==email,OTP.otp_code==otp,OTP.purpose==purpose,
-                                  OTP.expires_at>=datetime.now(timezone.utc)).first()
+    db_otp = db.query(OTP).filter(OTP.email==email,OTP.purpose==purpose,
+                                  OTP.expires_at>=datetime.now(timezone.utc)).with_for_update().first()
     if not db_otp:
         return(False,0,"Invalid or expired OTP")
+    if db_otp.locked_until is not None and db_otp.locked_until>datetime.now(timezone.utc):
+        db.rollback()
+        return (False,0,"no request until 10 min")
     if db_otp.otp_code==otp:
         db.delete(db_otp)
         db.commit()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Integer,String,DateTime,Boolean,ForeignKey,UniqueConstraint,Text
+from sqlalchemy import Column,Integer,BigInteger,String,DateTime,Boolean,ForeignKey,UniqueConstraint,Text,Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime,timezone
@@ -18,6 +18,12 @@ class User(Base):
     owned_workspaces=relationship("Workspace",back_populates="admin",foreign_keys="[Workspace.admin_id]")
     workspace_members=relationship("WorkspaceMember",back_populates="user",cascade="all, delete-orphan")
     profile=relationship("Profile",back_populates="user",uselist=False,cascade="all, delete-orphan")
+    __table_args__=(Index('ix_users_unverified_created_at','created_at',postgresql_where=is_verified==False),
+                    Index('ix_users_username_pattern','username',postgresql_ops={'username':'text_pattern_ops'}),)
+
+    @property
+    def has_password(self):
+        return self.password is not None
 
     @property
     def workspaces(self):
@@ -33,7 +39,8 @@ class OAuthAccount(Base):
     updated_at=Column(DateTime(timezone=True),default=lambda:datetime.now(timezone.utc),
                       onupdate=lambda:datetime.now(timezone.utc))
     user=relationship("User",back_populates="oauth_accounts")
-    __table_args__=(UniqueConstraint('user_id','provider',name='uq_user_provider'),)
+    __table_args__=(UniqueConstraint('user_id','provider',name='uq_user_provider'),
+                    Index('ix_oauth_accounts_provider_user','provider','provider_user_id'),)
 
 class TokenBlackList(Base):
     __tablename__ = "Blacklist"
@@ -41,18 +48,26 @@ class TokenBlackList(Base):
     token = Column(String(500), nullable=False, index=True, unique=True) 
     blacklisted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
 
+class JWTSigningKey(Base):
+    __tablename__="jwt_signing_keys"
+    not_before=Column(BigInteger,primary_key=True)
+    algorithm=Column(String(20),primary_key=True)
+    private_key=Column(Text,nullable=False)
+    created_at=Column(DateTime(timezone=True),nullable=False,default=lambda:datetime.now(timezone.utc))
+
 class OTP(Base):
     __tablename__ = "OTPs"
     id = Column(Integer, primary_key=True)
     user_id=Column(Integer,ForeignKey("users.id",ondelete="CASCADE"))
-    email = Column(String(100),nullable = False, index= True)
+    email = Column(String(100),nullable = False)
     otp_code = Column(String(6),nullable = False)
     purpose = Column(String(20),nullable = False)
     created_at = Column(DateTime(timezone=True),nullable= False, default = lambda: datetime.now(timezone.utc))
-    expires_at= Column(DateTime(timezone=True), nullable = False )
+    expires_at= Column(DateTime(timezone=True), nullable = False, index=True)
     failed_attempt=Column(Integer,default=0)
     max_attempt=Column(Integer,default=5)
     locked_until=Column(DateTime(timezone=True),nullable=True)
+    __table_args__=(Index('ix_OTPs_email_purpose','email','purpose'),)
 
 class Profile(Base):
     __tablename__="profiles"
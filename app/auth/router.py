@@ -3,11 +3,13 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.auth import schemas 
 from app.auth import crud
+from app.workspace import crud as workspace_crud
 from app.auth.models import User
-from app.utils.dbUtil import get_db
-from app.utils.passUtil import hash_pwd,verify_pass
+from app.utils.dbUtil import get_db,read_db
+from app.utils.passUtil import password_service
 from app.utils import JWTUtil
-from app.utils.emailUtil import send_otp_email
+from app.utils.otpUtil import otp_store
+from app.utils.usernameUtil import username_allocator
 from app.utils.S3Util import s3_upload,s3_delete,validate_image
 from typing import Optional
 import logging 
@@ -32,11 +34,9 @@ def register(request:Request,user:schemas.UserCreate,db:Session=Depends(get_db))
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Email already registered.")
         else:
             logger.info(f"re-registration for unverified email")
-            if exist_user.username!=user.username:
-                username_taken = crud.get_user_and_username(db, user.username)
-                if username_taken and username_taken.id!=exist_user.id:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Username already taken.")
-            pwd_hash = hash_pwd(user.password)
+            if exist_user.username!=user.username and not username_allocator.claim(db, user.username, user.email):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Username already taken.")
+            pwd_hash = password_service.hash_blocking(user.password)
             try:
                 updated_user = crud.update_user_unverified(db=db,email=user.email,username=user.username,
                                                            pwd=pwd_hash)
@@ -49,12 +49,11 @@ def register(request:Request,user:schemas.UserCreate,db:Session=Depends(get_db))
                 else:
                     logger.error(f"Unexpected IntegrityError during update: {e}")
                     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Update failed.")
-            crud.delete_otp_email(db, user.email, "registration")
+            otp_store.delete(db, user.email, "registration")
     else:
-        exist_username = crud.get_user_and_username(db, user.username)
-        if exist_username:
+        if not username_allocator.claim(db, user.username, user.email):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Username already taken.")
-        pwd_hash = hash_pwd(user.password)
+        pwd_hash = password_service.hash_blocking(user.password)
         try:
             db_user = crud.save_user_unverified(user, db, pwd_hash)
             logger.info("new user registered")
@@ -68,20 +67,19 @@ def register(request:Request,user:schemas.UserCreate,db:Session=Depends(get_db))
             else:
                 logger.error(f"Database integrity error")
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Registration failed.")
-    is_locked, min_left = crud.is_otp_locked(db, user.email, "registration")
+    is_locked, min_left = otp_store.is_locked(db, user.email, "registration")
     if is_locked:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail=f"Too many OTP requests. Please try again in {min_left} minutes.")
-    otp = crud.create_otp(db, user.email, "registration")
+    otp = otp_store.create(db, user.email, "registration", user.username)
     if otp is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="Unable to send OTP.")
-    send_otp_email(user.email, otp, "registration", user.username)
     logger.info(f"OTP sent to: {user.email}")
     return {"message": "Verification email sent successfully.","email": user.email}
 
 @router.post("/api/verify-registration/",response_model=schemas.OTPResponse)
 @limiter.limit("5/minute")
 def verify_registration(request:Request,otp:schemas.OTPVerify,db:Session=Depends(get_db)):
-    is_valid,attempts_remaining,error_message=crud.verify_and_delete_otp(db,otp.email,otp.otp_code,otp.purpose)
+    is_valid,attempts_remaining,error_message=otp_store.verify(db,otp.email,otp.otp_code,otp.purpose)
     if not is_valid:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="invalid or expired otp")
     user=crud.verify_email(db,otp.email)
@@ -97,13 +95,12 @@ def resend_otp(request:Request,req:schemas.OTPRequest,db:Session=Depends(get_db)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="user not found")
         if user.is_verified:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="email already verified")
-        is_locked,minutes_remaining=crud.is_otp_locked(db,user.email,"registration")
+        is_locked,minutes_remaining=otp_store.is_locked(db,user.email,"registration")
         if is_locked:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail=f"Too many failed OTP attempts.Try again in {minutes_remaining} minutes.")
-        otp=crud.create_otp(db,user.email,"registration")
+        otp=otp_store.create(db,user.email,"registration",user.username)
         if otp is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="unable to send otp")
-        send_otp_email(user.email,otp,"registration",user.username)
         logger.info(f"Registration OTP resent to: {user.email}")
         return {"message":"email resent successfully","email":user.email}
     elif req.purpose=="password_reset":
@@ -111,13 +108,12 @@ def resend_otp(request:Request,req:schemas.OTPRequest,db:Session=Depends(get_db)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="user not found")
         if user.password is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="user loged in through oauth so can't change password")
-        is_locked,minutes_remaining=crud.is_otp_locked(db,req.email,"password_reset")
+        is_locked,minutes_remaining=otp_store.is_locked(db,req.email,"password_reset")
         if is_locked:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail=f"Too many failed OTP attempts.Try again in {minutes_remaining} minutes.")
-        otp=crud.create_otp(db,req.email,"password_reset")
+        otp=otp_store.create(db,req.email,"password_reset")
         if otp is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="unable to send otp")
-        send_otp_email(req.email,otp,"password_reset")
         logger.info(f"Registration OTP resent to: {req.email}")
         return {"message":"email resent successfully","email":req.email}
     else:
@@ -133,13 +129,17 @@ def login(request:Request,data:schemas.UserLogin,db:Session=Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="email not verified")
     if db_user.password is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="use Google/GitHub to login.")
-    if not verify_pass(data.password,db_user.password):
+    verified,new_hash=password_service.verify_and_update_blocking(data.password,db_user.password)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid username/Email or Password")
+    if new_hash:
+        crud.update_password_id(db,db_user.id,new_hash)
+        logger.info(f"Password hash upgraded on login: {db_user.email}")
     if not db_user.is_active:
         crud.reactivate_user(db,db_user.email)
         logger.info(f"Account reactivated on login: {db_user.email}")
-    access_token=JWTUtil.create_token(data={"sub":db_user.email,"user_id":db_user.id})
-    refresh_token=JWTUtil.refresh_token(data={"sub":db_user.email,"user_id":db_user.id})
+    access_token,refresh_token=JWTUtil.token_pair(data={"sub":db_user.email,"user_id":db_user.id},
+                                                  workspaces=workspace_crud.workspace_claims(db,db_user.id))
     logger.info(f"User logged in successfully: {db_user.email}")
     return {"access_token":access_token,"refresh_token": refresh_token,"token_type":"Bearer"}
 
@@ -155,15 +155,15 @@ def refresh_token(request:Request,refresh:schemas.RefreshToken,db:Session=Depend
     db_user=crud.get_user_email(db,email)
     if not db_user or not db_user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="user not found or inactive")
-    access_token=JWTUtil.create_token(data={"sub":email,"user_id":user_id})
-    new_refresh=JWTUtil.refresh_token(data={"sub":email,"user_id":user_id})
+    access_token,new_refresh=JWTUtil.token_pair(data={"sub":email,"user_id":user_id},
+                                                workspaces=workspace_crud.workspace_claims(db,db_user.id))
     return {"access_token":access_token,"refresh_token":new_refresh,"token_type":"Bearer"}
 
 @router.post("/api/logout/")
 @limiter.limit("30/minute")
 def logout(request: Request,token:str=Depends(JWTUtil.oauth_schema),current_user:str=Depends(JWTUtil.get_user),
            db:Session=Depends(get_db)):
-    crud.add_token_blacklist(db,token)
+    JWTUtil.revoke_token(db,token)
     logger.info(f"User logged out: {current_user.email}")
     return{"message":"Successfull logout"}
 
@@ -174,7 +174,7 @@ def deactivate(request: Request,token:str=Depends(JWTUtil.oauth_schema),current_
     deactivate=crud.deactivate_user(db,current_user.email)
     if not deactivate:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="failed to deactivate account")
-    crud.add_token_blacklist(db,token)
+    JWTUtil.revoke_token(db,token)
     logger.info(f"Account deactivated: {current_user.email}")
     return{"message":"successfully deactivated","email":current_user.email}
 
@@ -182,7 +182,7 @@ def deactivate(request: Request,token:str=Depends(JWTUtil.oauth_schema),current_
 @limiter.limit("3/minute")
 def delete(request: Request,token:str=Depends(JWTUtil.oauth_schema),current_user=Depends(JWTUtil.get_user),
                   db:Session=Depends(get_db)):
-    crud.add_token_blacklist(db,token)
+    JWTUtil.revoke_token(db,token)
     deleted=crud.delete_user(db,current_user.id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="failed to delete account")
@@ -195,20 +195,19 @@ def forget_password(request: Request,req:schemas.EmailRequest,db:Session=Depends
     user=crud.user_exist(db,req.email)
     if not user or user.password is None:
         return schemas.OTPResponse(message="if email exists, otp sent",email=req.email)
-    is_locked,minutes_remaining=crud.is_otp_locked(db, req.email, "password_reset")
+    is_locked,minutes_remaining=otp_store.is_locked(db, req.email, "password_reset")
     if is_locked:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail=f"Too many failed OTP attempts.Try again in {minutes_remaining} minutes.")
-    otp=crud.create_otp(db,req.email,"password_reset")
+    otp=otp_store.create(db,req.email,"password_reset")
     if otp is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="unable to send otp")
-    send_otp_email(req.email,otp,"password_reset")
     logger.info(f"Password reset OTP sent to: {req.email}")
     return {"message":"email sent successfully","email":req.email}
 
 @router.post("/api/verify-reset-otp/",response_model=schemas.PasswordResetToken)
 @limiter.limit("10/minute")
 def verify_reset_otp(request: Request,data:schemas.PasswordResetRequest,db:Session=Depends(get_db)):
-    is_valid,attempts_remaining,error_message=crud.verify_and_delete_otp(db, data.email, data.otp, "password_reset")
+    is_valid,attempts_remaining,error_message=otp_store.verify(db, data.email, data.otp, "password_reset")
     if not is_valid:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="invalid or expired otp")
     reset_token=JWTUtil.create_token(data={"sub":data.email,"type":"password_reset","purpose":"reset_password"},
@@ -226,14 +225,16 @@ def complete_reset(request:Request,data:schemas.PasswordResetComplete,db:Session
     if payload.get("type")!="password_reset":
         logger.warning(f"Wrong tokn type")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="wrong token type")
+    if JWTUtil.is_revoked(db,data.reset_token,payload):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Invalid or expired token")
     email=payload.get("sub")
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="invalid payload")
-    new_pass=hash_pwd(data.password)
+    new_pass=password_service.hash_blocking(data.password)
     user=crud.update_password(db,email,new_pass)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
-    crud.add_token_blacklist(db,data.reset_token)
+    JWTUtil.revoke_token(db,data.reset_token,payload)
     logger.info(f"Password reset successfully for: {email}")
     return {"message": "Password reset successfully","email":email}
 
@@ -249,9 +250,9 @@ def check_email_exists(request:Request,req:schemas.EmailRequest,db:Session=Depen
 @router.post("/api/set-password/")
 @limiter.limit("5/minute")
 def set_password(request:Request,data:schemas.SetPassword,current_user:User=Depends(JWTUtil.get_user),db:Session=Depends(get_db)):
-    if current_user.password is not None:
+    if current_user.has_password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Password already set. Use change password instead.")
-    pwd_hash=hash_pwd(data.password)
+    pwd_hash=password_service.hash_blocking(data.password)
     updated_user=crud.update_password_id(db,current_user.id,pwd_hash)
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
@@ -260,7 +261,7 @@ def set_password(request:Request,data:schemas.SetPassword,current_user:User=Depe
 
 @router.get("/api/profile/", response_model=schemas.ProfileResponse)
 @limiter.limit("30/minute")
-def get_profile(request:Request,current_user:User=Depends(JWTUtil.get_user),db: Session = Depends(get_db)):
+def get_profile(request:Request,current_user:User=Depends(JWTUtil.get_user),db: Session = Depends(read_db(max_staleness=1))):
     profile=crud.get_profile(db,current_user.id)
     if not profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
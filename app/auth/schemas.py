@@ -157,6 +157,7 @@ class GitHubAuthResponse(BaseModel):
 class GitHubCallBack(BaseModel):
     code:str=Field(...,description="auth code by github")
     state:str=Field(...,description="protection state")
+    github_id:Optional[int]=Field(None,description="github user id returned by a previous login, enables cached profile lookups")
 
 class OAuthLink(BaseModel):
     code:str=Field(...,description="auth code for oauth")
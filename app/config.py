@@ -1,16 +1,35 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
     JWT_ACCESS_TOKEN_EXPIRE_DAYS: int
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int
+    JWT_BACKEND: str = "pyjwt"
+    JWT_CLAIMS_CACHE_SIZE: int = 10000
+    JWT_KEYS_DIR: str = "keys"
+    JWT_KEY_ENCRYPTION_KEY: str = ""
+    JWT_KEY_ROTATION_DAYS: int = 30
+    JWT_KEY_RELOAD_SECONDS: int = 300
+    JWT_WORKSPACE_CLAIMS_MAX: int = 100
+    JWKS_CACHE_SECONDS: int = 86400
     DB_CONNECTION: str
     DB_HOST: str
     DB_PORT: str
     DB_DATABASE: str
     DB_USERNAME: str
     DB_PASSWORD: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: str = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 60
+    DB_PGBOUNCER: bool = False
+    DB_REPLICA_URLS: str = ""
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_HEALTH_INTERVAL_SECONDS: float = 5
     API_KEY: str
     SMTP_HOST: str
     SMTP_PORT: int
@@ -35,6 +54,52 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str
     AWS_REGION: str
     S3_BUCKET_NAME: str
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_BLOOM_REBUILD_SECONDS: int = 3600
+    REVOCATION_FALLBACK_CHECK_SECONDS: int = 5
+    REVOCATION_REPLAY_INTERVAL_SECONDS: int = 60
+    USER_CACHE_L1_SIZE: int = 10000
+    USER_CACHE_L1_TTL_SECONDS: int = 5
+    USER_CACHE_L2_TTL_SECONDS: int = 300
+    QUERY_CACHE_L1_SIZE: int = 10000
+    QUERY_CACHE_L1_TTL_SECONDS: int = 5
+    QUERY_CACHE_L2_TTL_SECONDS: int = 300
+    QUERY_CACHE_FILL_TIMEOUT_SECONDS: float = 5
+    PASSWORD_POOL_WORKERS: int = 0
+    PASSWORD_POOL_MAX_PENDING: int = 0
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_HASH_TARGET_MS: int = 250
+    PASSWORD_HASH_COST: int = 0
+    ARGON2_MEMORY_KB: int = 65536
+    OTP_BACKEND: str = "redis"
+    CELERY_BROKER_URL: Optional[str] = None
+    MAINTENANCE_BATCH_SIZE: int = 1000
+    MAINTENANCE_BATCH_PAUSE_MS: int = 50
+    MAINTENANCE_OTP_INTERVAL_SECONDS: int = 900
+    MAINTENANCE_INTERVAL_SECONDS: int = 3600
+    BLACKLIST_RETENTION_DAYS: int = 30
+    UNVERIFIED_USER_RETENTION_DAYS: int = 7
+    OUTBOX_POLL_SECONDS: int = 15
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: int = 5
+    OUTBOX_BACKOFF_MAX_SECONDS: int = 1800
+    OUTBOX_RATE_PER_SECOND: float = 10
+    OUTBOX_RATE_BURST: int = 20
+    OUTBOX_CLAIM_LEASE_SECONDS: int = 300
+    OUTBOX_AUTH_RETRY_SECONDS: int = 300
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_READ_TIMEOUT: float = 10.0
+    HTTP_CLIENT_POOL_TIMEOUT: float = 5.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 50
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0
+    GITHUB_ETAG_TTL_SECONDS: int = 2592000
+    USERNAME_RESERVATION_SECONDS: int = 30
+    PAGINATION_DEFAULT_PAGE_SIZE: int = 50
+    PAGINATION_MAX_PAGE_SIZE: int = 200
  
     class Config:
         env_file = "app/.env"
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -7,9 +8,22 @@ from app.auth.router import router as auth_router
 from app.auth.githubrouter import router as github_router
 from app.auth.googlerouter import router as google_router
 from app.workspace.routers import router as workspace_router
-from app.utils.dbUtil import init_db
+from app.utils.dbUtil import async_engine
+from app.utils.replicaUtil import replica_set
+from app.utils.redisUtils import redis_client, async_redis_client
+from app.utils.revocationUtil import revocation_store
+from app.utils.userCacheUtil import user_cache
+from app.utils.cacheUtil import query_cache
+from app.utils.metricsUtil import registry
+from app.utils import JWTUtil
+from app.utils.passUtil import password_service
+from app.tasks import maintenance
+from app.utils.httpUtil import http_clients
+from app.utils.githubUtil import github_oauth
+from app.utils.googleUtil import google_oauth
 
 limiter = Limiter(key_func=get_remote_address)
+registry.add_collector(maintenance.collect_stats)
 
 app = FastAPI(
     docs_url="/docs",
@@ -33,7 +47,24 @@ app.add_middleware(
 
 @app.on_event("startup")
 def on_startup():
-   init_db()
+   revocation_store.start()
+   user_cache.start()
+   query_cache.start()
+   redis_client.start_listener()
+   revocation_store.rebuild()
+   JWTUtil.keyring.start()
+   password_service.start()
+   replica_set.start()
+   http_clients.open(github_oauth.token_url,github_oauth.user_api_url,google_oauth.token_url,google_oauth.certs_url)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+   redis_client.stop_listener()
+   password_service.shutdown()
+   await http_clients.aclose()
+   await async_redis_client.close()
+   await async_engine.dispose()
+   await replica_set.dispose()
 
 @app.get("/")
 @limiter.limit("100/minute")
@@ -45,6 +76,16 @@ def root(request: Request):
 def health_check(request: Request):
     return {"status": "OK", "service": "Alige Backend", "version": "1.0"}
 
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def jwks(response: Response):
+    JWTUtil.keyring.maybe_reload()
+    response.headers["Cache-Control"] = f"public, max-age={JWTUtil.settings.JWKS_CACHE_SECONDS}"
+    return JWTUtil.keyring.jwks()
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+def metrics():
+    return registry.render()
+
 app.include_router(auth_router, tags=["Authentication"])
 app.include_router(github_router, tags=["Github OAuth"])
 app.include_router(google_router, tags=["Google OAuth"])
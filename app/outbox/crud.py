@@ -0,0 +1,65 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.outbox.model import EmailOutbox
+from datetime import datetime,timezone,timedelta
+from typing import List
+from app.tasks.worker import celery_app
+import logging
+
+logger=logging.getLogger(__name__)
+
+def enqueue(db:Session,kind:str,recipients:List[str],payload:dict)->EmailOutbox:
+    message=EmailOutbox(kind=kind,recipients=recipients,payload=payload,status="pending",attempts=0,
+                        next_attempt_at=datetime.now(timezone.utc))
+    db.add(message)
+    db.info["outbox_wakeup"]=True
+    return message
+
+def claim_due(db:Session,limit:int,lease:float)->List[EmailOutbox]:
+    now=datetime.now(timezone.utc)
+    messages=(db.query(EmailOutbox).filter(EmailOutbox.status=="pending",EmailOutbox.next_attempt_at<=now)
+              .order_by(EmailOutbox.next_attempt_at,EmailOutbox.id).limit(limit).with_for_update(skip_locked=True).all())
+    for message in messages:
+        message.next_attempt_at=now+timedelta(seconds=lease)
+    return messages
+
+def mark_sent(message:EmailOutbox):
+    message.status="sent"
+    message.sent_at=datetime.now(timezone.utc)
+    message.payload=None
+    message.last_error=None
+
+def mark_retry(message:EmailOutbox,error:str,delay:float,max_attempts:int):
+    message.attempts+=1
+    message.last_error=error[:1000]
+    if message.attempts>=max_attempts:
+        message.status="failed"
+        message.payload=None
+        logger.error(f"Giving up on outbox message {message.id} to {len(message.recipients)} recipients: {error}")
+        return
+    message.next_attempt_at=datetime.now(timezone.utc)+timedelta(seconds=delay)
+
+def mark_failed(message:EmailOutbox,error:str):
+    message.attempts+=1
+    message.status="failed"
+    message.payload=None
+    message.last_error=error[:1000]
+    logger.error(f"Outbox message {message.id} to {len(message.recipients)} recipients rejected: {error}")
+
+def defer(message:EmailOutbox,delay:float):
+    message.next_attempt_at=datetime.now(timezone.utc)+timedelta(seconds=delay)
+
+def wake_worker():
+    try:
+        celery_app.send_task("app.tasks.outbox.drain_outbox",retry=False)
+    except Exception as e:
+        logger.error(f"Failed to wake outbox worker, beat will pick the message up: {str(e)}")
+
+@event.listens_for(Session,"after_commit")
+def _after_commit(session:Session):
+    if session.info.pop("outbox_wakeup",False):
+        wake_worker()
+
+@event.listens_for(Session,"after_rollback")
+def _after_rollback(session:Session):
+    session.info.pop("outbox_wakeup",None)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column,Integer,String,DateTime,Text,JSON,Index
+from app.utils.dbUtil import Base
+from datetime import datetime,timezone
+
+class EmailOutbox(Base):
+    __tablename__="email_outbox"
+    id=Column(Integer,primary_key=True)
+    kind=Column(String(50),nullable=False)
+    recipients=Column(JSON,nullable=False)
+    payload=Column(JSON,nullable=True)
+    status=Column(String(20),nullable=False,default="pending")
+    attempts=Column(Integer,nullable=False,default=0)
+    next_attempt_at=Column(DateTime(timezone=True),nullable=False,default=lambda:datetime.now(timezone.utc))
+    last_error=Column(Text,nullable=True)
+    created_at=Column(DateTime(timezone=True),nullable=False,default=lambda:datetime.now(timezone.utc))
+    sent_at=Column(DateTime(timezone=True),nullable=True)
+    __table_args__=(Index('ix_email_outbox_pending','next_attempt_at','id',postgresql_where=status=="pending"),)
@@ -0,0 +1,120 @@
+import time
+from functools import lru_cache
+from app import config
+from app.auth import crud
+from app.workspace import crud as workspace_crud
+from app.tasks.worker import celery_app
+from app.utils.dbUtil import SessionLocal
+from app.utils.metricsUtil import registry
+from app.utils.redisUtils import redis_client
+from app.utils import JWTUtil
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+STATS_KEY = "maintenance:last:"
+JOBS = ("expired_otps", "token_blacklist", "unverified_users", "member_counts", "revocation_replay")
+
+last_rows = registry.gauge("maintenance_last_run_rows", "Rows deleted or scanned by the last maintenance run", ["job"])
+last_seconds = registry.gauge("maintenance_last_run_seconds", "Duration of the last maintenance run", ["job"])
+last_batches = registry.gauge("maintenance_last_run_batches", "Batches issued by the last maintenance run", ["job"])
+last_finished = registry.gauge("maintenance_last_run_timestamp_seconds", "Unix time the last maintenance run finished", ["job"])
+last_repaired = registry.gauge("maintenance_last_run_repaired", "Rows corrected by the last reconciliation run", ["job"])
+
+def run_batched(job: str, delete_batch) -> dict:
+    batch_size = settings.MAINTENANCE_BATCH_SIZE
+    started = time.monotonic()
+    rows = batches = 0
+    db = SessionLocal()
+    try:
+        while True:
+            deleted = delete_batch(db, batch_size)
+            rows += deleted
+            batches += 1
+            if deleted < batch_size:
+                break
+            if settings.MAINTENANCE_BATCH_PAUSE_MS:
+                time.sleep(settings.MAINTENANCE_BATCH_PAUSE_MS / 1000)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    stats = {"rows": rows, "batches": batches, "seconds": round(time.monotonic() - started, 3), "finished_at": int(time.time())}
+    try:
+        redis_client.client.hset(STATS_KEY + job, mapping=stats)
+    except Exception as e:
+        logger.error(f"Failed to record maintenance stats for {job}: {str(e)}")
+    logger.info(f"Maintenance {job}: processed {rows} rows in {batches} batches ({stats['seconds']}s)")
+    return stats
+
+@celery_app.task(name="app.tasks.maintenance.delete_expired_otps")
+def delete_expired_otps():
+    return run_batched("expired_otps", crud.delete_expired_otps)
+
+@celery_app.task(name="app.tasks.maintenance.clear_blacklist")
+def clear_blacklist():
+    days = max(settings.BLACKLIST_RETENTION_DAYS, settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS,
+               settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
+    return run_batched("token_blacklist", lambda db, batch_size: crud.clear_blacklist(db, days, batch_size))
+
+@celery_app.task(name="app.tasks.maintenance.delete_unverified_users")
+def delete_unverified_users():
+    days = settings.UNVERIFIED_USER_RETENTION_DAYS
+    return run_batched("unverified_users", lambda db, batch_size: crud.delete_stale_unverified_users(db, days, batch_size))
+
+@celery_app.task(name="app.tasks.maintenance.reconcile_member_counts")
+def reconcile_member_counts():
+    cursor = {"after_id": 0, "repaired": 0}
+
+    def reconcile_batch(db, batch_size):
+        cursor["after_id"], scanned, repaired = workspace_crud.reconcile_member_counts(db, cursor["after_id"], batch_size)
+        cursor["repaired"] += repaired
+        return scanned
+
+    stats = run_batched("member_counts", reconcile_batch)
+    stats["repaired"] = cursor["repaired"]
+    if cursor["repaired"]:
+        logger.warning(f"Repaired member_count drift on {cursor['repaired']} workspaces")
+    try:
+        redis_client.client.hset(STATS_KEY + "member_counts", "repaired", cursor["repaired"])
+    except Exception as e:
+        logger.error(f"Failed to record maintenance stats for member_counts: {str(e)}")
+    return stats
+
+@celery_app.task(name="app.tasks.maintenance.replay_revocations")
+def replay_revocations():
+    cursor = {"after_id": 0}
+
+    def replay_batch(db, batch_size):
+        cursor["after_id"], scanned, replayed = crud.replay_blacklist(db, cursor["after_id"], batch_size)
+        if replayed:
+            logger.info(f"Replayed {replayed} fallback token revocations into Redis")
+        return scanned
+
+    return run_batched("revocation_replay", replay_batch)
+
+@celery_app.task(name="app.tasks.maintenance.rotate_signing_keys")
+def rotate_signing_keys():
+    if not JWTUtil.keyring.symmetric:
+        JWTUtil.keyring.rotate()
+
+def collect_stats():
+    pipe = redis_client.client.pipeline(transaction=False)
+    for job in JOBS:
+        pipe.hgetall(STATS_KEY + job)
+    for job, stats in zip(JOBS, pipe.execute()):
+        if not stats:
+            continue
+        last_rows.set(int(stats["rows"]), job=job)
+        last_batches.set(int(stats["batches"]), job=job)
+        last_seconds.set(float(stats["seconds"]), job=job)
+        last_finished.set(int(stats["finished_at"]), job=job)
+        if "repaired" in stats:
+            last_repaired.set(int(stats["repaired"]), job=job)
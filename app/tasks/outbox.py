@@ -0,0 +1,75 @@
+import random
+from functools import lru_cache
+from app import config
+from app.outbox import crud as outbox_crud
+from app.tasks.worker import celery_app
+from app.utils.dbUtil import SessionLocal
+from app.utils.emailUtil import API_KEY, FROM_EMAIL, DeliveryError, SendGridSender, render
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+_sender = None
+
+def get_sender() -> SendGridSender:
+    global _sender
+    if _sender is None:
+        _sender = SendGridSender(API_KEY, FROM_EMAIL, settings.OUTBOX_RATE_PER_SECOND, settings.OUTBOX_RATE_BURST)
+    return _sender
+
+def backoff(attempts: int) -> float:
+    delay = min(settings.OUTBOX_BACKOFF_MAX_SECONDS, settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** attempts))
+    return delay * random.uniform(0.5, 1.0)
+
+def drain_batch(db, sender: SendGridSender) -> tuple:
+    messages = outbox_crud.claim_due(db, settings.OUTBOX_BATCH_SIZE, settings.OUTBOX_CLAIM_LEASE_SECONDS)
+    db.commit()
+    sent = 0
+    for i, message in enumerate(messages):
+        try:
+            subject, html = render(message.kind, message.payload)
+            sender.send(message.recipients, subject, html)
+        except DeliveryError as e:
+            if e.retry_after is not None:
+                for deferred in messages[i:]:
+                    outbox_crud.defer(deferred, e.retry_after)
+                db.commit()
+                logger.warning(f"{str(e)}, pausing outbox for {e.retry_after}s")
+                break
+            if e.permanent:
+                outbox_crud.mark_failed(message, str(e))
+            else:
+                outbox_crud.mark_retry(message, str(e), backoff(message.attempts), settings.OUTBOX_MAX_ATTEMPTS)
+        except Exception as e:
+            outbox_crud.mark_failed(message, f"Unable to render message: {str(e)}")
+        else:
+            outbox_crud.mark_sent(message)
+            sent += 1
+        db.commit()
+    return len(messages), sent
+
+@celery_app.task(name="app.tasks.outbox.drain_outbox")
+def drain_outbox():
+    sender = get_sender()
+    db = SessionLocal(expire_on_commit=False)
+    total = 0
+    try:
+        while True:
+            claimed, sent = drain_batch(db, sender)
+            total += sent
+            if claimed < settings.OUTBOX_BATCH_SIZE or sent == 0:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if total:
+        logger.info(f"Outbox delivered {total} emails")
+    return total
@@ -0,0 +1,51 @@
+from celery import Celery
+from functools import lru_cache
+from app import config
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+def broker_url():
+    return settings.CELERY_BROKER_URL or f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/1"
+
+celery_app = Celery("agile", broker=broker_url(), include=["app.tasks.maintenance", "app.tasks.outbox"])
+celery_app.conf.update(
+    task_ignore_result=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    timezone="UTC",
+    task_routes={"app.tasks.outbox.*": {"queue": "email"}},
+    beat_schedule={
+        "drain-email-outbox": {
+            "task": "app.tasks.outbox.drain_outbox",
+            "schedule": settings.OUTBOX_POLL_SECONDS,
+        },
+        "delete-expired-otps": {
+            "task": "app.tasks.maintenance.delete_expired_otps",
+            "schedule": settings.MAINTENANCE_OTP_INTERVAL_SECONDS,
+        },
+        "clear-token-blacklist": {
+            "task": "app.tasks.maintenance.clear_blacklist",
+            "schedule": settings.MAINTENANCE_INTERVAL_SECONDS,
+        },
+        "delete-unverified-users": {
+            "task": "app.tasks.maintenance.delete_unverified_users",
+            "schedule": settings.MAINTENANCE_INTERVAL_SECONDS,
+        },
+        "replay-token-revocations": {
+            "task": "app.tasks.maintenance.replay_revocations",
+            "schedule": settings.REVOCATION_REPLAY_INTERVAL_SECONDS,
+        },
+        "rotate-signing-keys": {
+            "task": "app.tasks.maintenance.rotate_signing_keys",
+            "schedule": settings.MAINTENANCE_INTERVAL_SECONDS,
+        },
+        "reconcile-member-counts": {
+            "task": "app.tasks.maintenance.reconcile_member_counts",
+            "schedule": settings.MAINTENANCE_INTERVAL_SECONDS,
+        },
+    },
+)
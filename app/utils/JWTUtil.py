@@ -1,13 +1,20 @@
 from functools import lru_cache
 from app import config
 from datetime import timedelta,timezone,datetime
-from jose import JWTError,jwt
-from jose.exceptions import ExpiredSignatureError
 from fastapi import Depends,HTTPException,status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app.utils.dbUtil import get_db
+from app.utils.dbUtil import get_db,SessionLocal
+from app.utils.revocationUtil import revocation_store
+from app.utils.userCacheUtil import user_cache
+from app.utils.jwtCodecUtil import CachingDecoder,TokenError
+from app.utils.keyringUtil import build_keyring
 from app.auth import crud
+import logging
+import time
+import uuid
+
+logger=logging.getLogger(__name__)
 
 @lru_cache()
 def get_settings():
@@ -15,43 +22,87 @@ def get_settings():
 
 settings = get_settings()
 oauth_schema=OAuth2PasswordBearer(tokenUrl="/api/login")
+ACCESS_LIFETIME=timedelta(days=settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS)
+REFRESH_LIFETIME=timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
+keyring=build_keyring(settings,SessionLocal,max(ACCESS_LIFETIME,REFRESH_LIFETIME))
+decoder=CachingDecoder(None,settings.JWT_CLAIMS_CACHE_SIZE)
+keyring.on_reload(decoder.use)
+fallback={"pending":True,"checked_at":0.0}
+
+def _claims(data:dict,now:datetime,lifetime:timedelta,**extra)->dict:
+    to_encode=dict(data)
+    to_encode.update(extra)
+    to_encode.update({"exp":int((now+lifetime).timestamp()),"iat":int(now.timestamp()),"jti":uuid.uuid4().hex})
+    return to_encode
 
-def create_token(data:dict,expire_delta:timedelta=None):
-    to_encode=data.copy()
-    if expire_delta:
-        expire=datetime.now(timezone.utc)+expire_delta
-    else:
-        expire=datetime.now(timezone.utc)+timedelta(days=settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp":expire,"iat":datetime.now(timezone.utc)})
-    encode_jwt=jwt.encode(to_encode,settings.JWT_SECRET_KEY,algorithm=settings.JWT_ALGORITHM)
-    return encode_jwt
+def create_token(data:dict,expire_delta:timedelta=None,workspaces:dict=None):
+    keyring.maybe_reload()
+    now=datetime.now(timezone.utc)
+    return keyring.codec.encode(_claims(data,now,expire_delta or ACCESS_LIFETIME,**(workspaces or {})))
 
 def refresh_token(data:dict):
-    to_encode=data.copy()
-    expire=datetime.now(timezone.utc)+timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp":expire,"iat":datetime.now(timezone.utc),"type":"refresh"})
-    encode_jwt=jwt.encode(to_encode,settings.JWT_SECRET_KEY,algorithm=settings.JWT_ALGORITHM)
-    return encode_jwt
+    keyring.maybe_reload()
+    now=datetime.now(timezone.utc)
+    return keyring.codec.encode(_claims(data,now,REFRESH_LIFETIME,type="refresh"))
+
+def token_pair(data:dict,workspaces:dict=None)->tuple:
+    keyring.maybe_reload()
+    codec=keyring.codec
+    now=datetime.now(timezone.utc)
+    return (codec.encode(_claims(data,now,ACCESS_LIFETIME,**(workspaces or {}))),
+            codec.encode(_claims(data,now,REFRESH_LIFETIME,type="refresh")))
 
 def decode_token(token:str):
+    keyring.maybe_reload()
     try:
-        payload=jwt.decode(token,settings.JWT_SECRET_KEY,algorithms=[settings.JWT_ALGORITHM])
-        return payload
-    except ExpiredSignatureError:
-        return None
-    except JWTError:
+        return decoder.decode(token)
+    except TokenError:
         return None
     
+def is_revoked(db:Session,token:str,payload:dict)->bool:
+    jti=payload.get("jti")
+    if jti is None:
+        return crud.token_blacklisted(db,token)
+    revoked=revocation_store.is_revoked(jti)
+    if revoked is None or (not revoked and fallback_pending(db)):
+        return crud.token_blacklisted(db,token)
+    return revoked
+
+def fallback_pending(db:Session)->bool:
+    now=time.monotonic()
+    if now-fallback["checked_at"]>=settings.REVOCATION_FALLBACK_CHECK_SECONDS:
+        fallback["checked_at"]=now
+        fallback["pending"]=crud.has_blacklisted_tokens(db)
+    return fallback["pending"]
+
+def revoke_token(db:Session,token:str,payload:dict=None):
+    payload=payload or decode_token(token)
+    if payload and payload.get("jti") and revocation_store.revoke(payload["jti"],payload["exp"]):
+        return True
+    logger.warning("Falling back to blacklist table for token revocation")
+    crud.add_token_blacklist(db,token)
+    fallback["pending"]=True
+    return True
+
+def token_claims(token:str=Depends(oauth_schema))->dict:
+    return decode_token(token) or {}
+
 def get_user(token:str=Depends(oauth_schema),db:Session=Depends(get_db)):
-    if crud.token_blacklisted(db,token):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="token revoked",headers={"WWW-Authenticate":"Bearer"})
     payload=decode_token(token)
     if payload is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="couldn't validate credentials",headers={"WWW-Authenticate":"Bearer"})
+    if is_revoked(db,token,payload):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="token revoked",headers={"WWW-Authenticate":"Bearer"})
     email:str=payload.get("sub")
     if email is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="couldn't validate credentials",headers={"WWW-Authenticate":"Bearer"})
-    user=crud.get_user_email(db,email)
+    user_id=payload.get("user_id")
+    user=user_cache.get(user_id) if user_id is not None else None
+    if user is None or user.email!=email:
+        started=time.perf_counter()
+        db_user=crud.get_user_email(db,email)
+        user_cache.record_fetch(time.perf_counter()-started)
+        user=user_cache.set(db_user) if db_user is not None else None
     if user is None or user.is_active == False:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="couldn't validate credentials",headers={"WWW-Authenticate":"Bearer"})
     return user
@@ -0,0 +1,186 @@
+import inspect
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from typing import Any, Callable, Iterable
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from app import config
+from app.utils.redisUtils import redis_client
+from app.utils.metricsUtil import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+KEY_PREFIX = "cache:"
+TAG_PREFIX = "cache:tag:"
+FRESH_PREFIX = "cache:fresh:"
+CHANNEL = "cache:invalidate"
+
+cache_requests = registry.counter("query_cache_requests_total", "Read-through query cache lookups by function and result",
+                                  ["function", "result"])
+fill_time = registry.histogram("query_cache_fill_seconds", "Database time spent filling query cache misses", ["function"])
+
+def from_replica(db) -> bool:
+    return getattr(db, "replica", None) is not None and not db.info.get("pinned")
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+class QueryCache:
+    def __init__(self):
+        self.maxsize = settings.QUERY_CACHE_L1_SIZE
+        self.l1_ttl = settings.QUERY_CACHE_L1_TTL_SECONDS
+        self.l2_ttl = settings.QUERY_CACHE_L2_TTL_SECONDS
+        self.fill_timeout = settings.QUERY_CACHE_FILL_TIMEOUT_SECONDS
+        self.fresh_ttl = max(1, math.ceil(settings.DB_REPLICA_MAX_LAG_SECONDS))
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        redis_client.subscribe(CHANNEL, self._drop_tags)
+
+    def _drop_tags(self, message: str):
+        tags = set(message.split(","))
+        with self._lock:
+            for key in [key for key, entry in self._local.items() if tags.intersection(entry[1])]:
+                del self._local[key]
+
+    def _get_local(self, key: str):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _set_local(self, key: str, tags: tuple, value):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.l1_ttl, tags, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def _single_flight(self, key: str, load: Callable[[], Any]) -> tuple:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.fill_timeout) and not flight.failed:
+                return True, flight.value
+            return False, load()
+        try:
+            flight.value = load()
+        except Exception:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return False, flight.value
+
+    def _fill(self, name: str, adapter: TypeAdapter, load: Callable[[], Any]):
+        started = time.perf_counter()
+        result = load()
+        fill_time.observe(time.perf_counter() - started, function=name)
+        return adapter.validate_python(result, from_attributes=True)
+
+    def _get(self, name: str, key: str, tags: tuple, adapter: TypeAdapter, load: Callable[[], Any], replica: bool):
+        entry = self._get_local(key)
+        if entry is not None:
+            cache_requests.inc(function=name, result="l1_hit")
+            return entry[2]
+        raw = versions = fresh = None
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.mget([TAG_PREFIX + tag for tag in tags])
+            pipe.mget([FRESH_PREFIX + tag for tag in tags])
+            raw, versions, fresh = pipe.execute()
+            versions = [int(version or 0) for version in versions]
+        except Exception as e:
+            logger.error(f"Redis query cache read error: {str(e)}")
+            versions = None
+        if raw is not None:
+            data = json.loads(raw)
+            if data["v"] == versions:
+                value = adapter.validate_python(data["d"])
+                self._set_local(key, tags, value)
+                cache_requests.inc(function=name, result="l2_hit")
+                return value
+            cache_requests.inc(function=name, result="stale")
+        else:
+            cache_requests.inc(function=name, result="miss")
+        coalesced, value = self._single_flight(key, lambda: self._fill(name, adapter, load))
+        if coalesced:
+            cache_requests.inc(function=name, result="coalesced")
+            return value
+        if versions is None or (replica and any(fresh)):
+            return value
+        self._set_local(key, tags, value)
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.set(key, json.dumps({"v": versions, "d": adapter.dump_python(value, mode="json")}), ex=self.l2_ttl)
+            for tag in tags:
+                pipe.expire(TAG_PREFIX + tag, 2 * self.l2_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis query cache write error: {str(e)}")
+        return value
+
+    def cached(self, name: str, tags: Callable[..., Iterable[str]], returns):
+        adapter = TypeAdapter(returns)
+
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @wraps(func)
+            def wrapper(db, *args, **kwargs):
+                bound = signature.bind(db, *args, **kwargs)
+                bound.apply_defaults()
+                params = list(bound.arguments.values())[1:]
+                key = f"{KEY_PREFIX}{name}:{json.dumps(params, default=str, separators=(',', ':'))}"
+                return self._get(name, key, tuple(tags(*params)), adapter, lambda: func(db, *args, **kwargs),
+                                 from_replica(db))
+            return wrapper
+        return decorator
+
+    def invalidate(self, tags: Iterable[str], strict: bool = False):
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return
+        self._drop_tags(",".join(tags))
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(TAG_PREFIX + tag)
+                pipe.expire(TAG_PREFIX + tag, 2 * self.l2_ttl)
+                pipe.set(FRESH_PREFIX + tag, 1, ex=self.fresh_ttl)
+            pipe.publish(CHANNEL, ",".join(tags))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis query cache invalidation error: {str(e)}")
+            if strict:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    detail="Change could not be applied, try again") from e
+
+query_cache = QueryCache()
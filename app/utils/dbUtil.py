@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, Select
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from functools import lru_cache
 from app import config
+from app.utils.poolUtil import engine_options, instrument
+from app.utils.replicaUtil import replica_set
+from typing import Optional
 from sqlalchemy.ext.declarative import declarative_base
 
 Base=declarative_base()
@@ -18,15 +22,63 @@ def pgsql_url():
         f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_DATABASE}"
     )
 
-engine = create_engine(pgsql_url(),pool_pre_ping=True,)
+def async_pgsql_url():
+    settings = get_settings()
+    return (
+        f"postgresql+asyncpg://"
+        f"{settings.DB_USERNAME}:{settings.DB_PASSWORD}"
+        f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_DATABASE}"
+    )
+
+engine = instrument(create_engine(pgsql_url(),**engine_options(pgsql_url())))
 SessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine,)
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+async_engine = create_async_engine(async_pgsql_url(),**engine_options(async_pgsql_url(),is_async=True))
+instrument(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine,autoflush=False,expire_on_commit=False,)
+
+class RoutingSession(Session):
+    def __init__(self, replica=None, **kw):
+        super().__init__(**kw)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is not None and not self.info.get("pinned"):
+            if not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None:
+                return self.replica
+            self.info["pinned"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession,autocommit=False,autoflush=False,bind=engine,)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_engine,sync_session_class=RoutingSession,autoflush=False,expire_on_commit=False,)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def read_db(max_staleness: Optional[float] = None):
+    def dependency():
+        replica = replica_set.choose(max_staleness)
+        db = ReadSessionLocal(replica=replica.engine if replica else None)
+        try:
+            yield db
+        finally:
+            db.close()
+    return dependency
+
+def async_read_db(max_staleness: Optional[float] = None):
+    async def dependency():
+        replica = replica_set.choose(max_staleness)
+        async with AsyncReadSessionLocal(replica=replica.async_engine.sync_engine if replica else None) as db:
+            yield db
+    return dependency
+
+get_read_db = read_db()
+get_async_read_db = async_read_db()
@@ -1,7 +1,15 @@
 from functools import lru_cache
+from sqlalchemy.orm import Session
 from app import config
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from app.outbox import crud as outbox_crud
+from app.utils.httpUtil import http_clients
+from app.utils.metricsUtil import registry
+import httpx
+import threading
+import time
+import logging
+
+logger=logging.getLogger(__name__)
 
 @lru_cache()
 def get_settings():
@@ -10,6 +18,10 @@ def get_settings():
 settings = get_settings()
 API_KEY = settings.API_KEY
 FROM_EMAIL = settings.FROM_EMAIL
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+MAX_PERSONALIZATIONS = 1000
+
+auth_failures=registry.counter("sendgrid_auth_failures_total","SendGrid requests rejected because the API key is missing, invalid or lacks permission",["status"])
 
 def get_registration_html(otp:str,username:str)->str:
     return f"""
@@ -47,28 +59,8 @@ def get_password_reset_html(otp: str) -> str:
     </html>
     """
 
-def send_otp_email(email: str, otp: str, purpose: str, username: str = "User"):
-    try:
-        if purpose == "registration":
-            subject = "Your Registration OTP"
-            html = get_registration_html(otp, username)
-        elif purpose == "password_reset":
-            subject = "Your Password Reset OTP"
-            html = get_password_reset_html(otp)
-        else:
-            return False
-        message = Mail(from_email=FROM_EMAIL,to_emails=email,subject=subject,html_content=html)
-        sg = SendGridAPIClient(API_KEY)
-        response = sg.send(message)
-        print(f"Email sent to {email} - Status: {response.status_code}")
-        return True
-        
-    except Exception as e:
-        print(f"Email error: {str(e)}")
-        return False
-    
-def workspace_invitation(email:str,name:str,code:str,admin: str):
-    html=f"""
+def get_invitation_html(name:str,code:str,admin:str)->str:
+    return f"""
     <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
@@ -91,12 +83,92 @@ def workspace_invitation(email:str,name:str,code:str,admin: str):
         </body>
     </html>
     """
-    message = Mail(from_email=FROM_EMAIL,to_emails=email,subject=f"Invitation to join {name}",html_content=html)
-    try:
-        sg = SendGridAPIClient(API_KEY)
-        response = sg.send(message)
-        print(f"Email sent to {email} - Status: {response.status_code}")
-        return True
-    except Exception as e:
-        print(f"Error sending email: {str(e)}")
-        return False
\ No newline at end of file
+
+def render(kind:str,payload:dict)->tuple:
+    if kind=="otp_registration":
+        return "Your Registration OTP",get_registration_html(payload["otp"],payload.get("username") or "User")
+    if kind=="otp_password_reset":
+        return "Your Password Reset OTP",get_password_reset_html(payload["otp"])
+    if kind=="workspace_invitation":
+        return f"Invitation to join {payload['name']}",get_invitation_html(payload["name"],payload["code"],payload["admin"])
+    raise ValueError(f"Unknown email kind: {kind}")
+
+def send_otp_email(db:Session,email:str,otp:str,purpose:str,username:str="User"):
+    if purpose not in ("registration","password_reset"):
+        return False
+    outbox_crud.enqueue(db,f"otp_{purpose}",[email],{"otp":otp,"username":username})
+    return True
+
+def workspace_invitation(db:Session,emails:list,name:str,code:str,admin:str):
+    for i in range(0,len(emails),MAX_PERSONALIZATIONS):
+        outbox_crud.enqueue(db,"workspace_invitation",emails[i:i+MAX_PERSONALIZATIONS],{"name":name,"code":code,"admin":admin})
+    return True
+
+class DeliveryError(Exception):
+    def __init__(self,message:str,retry_after:float=None,permanent:bool=False):
+        super().__init__(message)
+        self.retry_after=retry_after
+        self.permanent=permanent
+
+class TokenBucket:
+    def __init__(self,rate:float,burst:int):
+        self.rate=rate
+        self.capacity=max(1,burst)
+        self.tokens=float(self.capacity)
+        self.updated=time.monotonic()
+        self.lock=threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now=time.monotonic()
+                self.tokens=min(self.capacity,self.tokens+(now-self.updated)*self.rate)
+                self.updated=now
+                if self.tokens>=1:
+                    self.tokens-=1
+                    return
+                wait=(1-self.tokens)/self.rate
+            time.sleep(wait)
+
+    def pause(self,seconds:float):
+        with self.lock:
+            self.tokens=min(self.tokens,0)-seconds*self.rate
+            self.updated=time.monotonic()
+
+class SendGridSender:
+    def __init__(self,api_key:str,from_email:str,rate:float,burst:int):
+        self.from_email=from_email
+        self.headers={"Authorization":f"Bearer {api_key}"}
+        self.bucket=TokenBucket(rate,burst)
+        self.client=http_clients.get_sync(SENDGRID_URL)
+
+    def send(self,recipients:list,subject:str,html:str):
+        self.bucket.acquire()
+        body={"personalizations":[{"to":[{"email":recipient}]} for recipient in recipients],"from":{"email":self.from_email},
+              "subject":subject,"content":[{"type":"text/html","value":html}]}
+        try:
+            response=self.client.post(SENDGRID_URL,json=body,headers=self.headers)
+        except httpx.HTTPError as e:
+            raise DeliveryError(f"SendGrid request failed: {str(e)}")
+        if response.status_code<300:
+            return
+        if response.status_code==429:
+            retry_after=_retry_after(response)
+            self.bucket.pause(retry_after)
+            raise DeliveryError("SendGrid rate limit reached",retry_after=retry_after)
+        if response.status_code in (401,403):
+            auth_failures.inc(status=str(response.status_code))
+            logger.critical(f"SendGrid rejected the API key ({response.status_code}), holding the outbox: {response.text[:200]}")
+            raise DeliveryError(f"SendGrid rejected the API key {response.status_code}",retry_after=settings.OUTBOX_AUTH_RETRY_SECONDS)
+        if response.status_code>=500:
+            raise DeliveryError(f"SendGrid error {response.status_code}: {response.text[:200]}")
+        raise DeliveryError(f"SendGrid rejected message {response.status_code}: {response.text[:200]}",permanent=True)
+
+def _retry_after(response:httpx.Response)->float:
+    value=response.headers.get("Retry-After")
+    if value and value.isdigit():
+        return float(value)
+    reset=response.headers.get("X-RateLimit-Reset")
+    if reset and reset.isdigit():
+        return max(1.0,float(reset)-time.time())
+    return 1.0
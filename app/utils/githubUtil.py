@@ -1,7 +1,12 @@
-import httpx
 from functools import lru_cache
 from app import config
-from typing import Optional, Dict, Literal
+from app.utils.httpUtil import http_clients
+from app.utils.metricsUtil import registry
+from app.utils.redisUtils import async_redis_client
+from typing import Optional, Dict, Literal, Tuple
+import asyncio
+import json
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +17,14 @@ def get_settings():
 
 settings = get_settings()
 
+EMAIL_SCOPES = ("user", "user:email")
+ETAG_PREFIX = "github:etag:"
+
+rate_limit_remaining = registry.gauge("github_rate_limit_remaining", "Requests left in the current GitHub rate-limit window", ["resource"])
+rate_limit_limit = registry.gauge("github_rate_limit_limit", "Size of the GitHub rate-limit window", ["resource"])
+rate_limit_reset = registry.gauge("github_rate_limit_reset_seconds", "Seconds until the GitHub rate-limit window resets", ["resource"])
+conditional_requests = registry.counter("github_conditional_requests_total", "GitHub profile requests by cache outcome", ["endpoint", "result"])
+
 class GitHubOAuth:
     def __init__(self):
         self.client_id_web = settings.GITHUB_CLIENT_ID_WEB
@@ -38,7 +51,7 @@ class GitHubOAuth:
         query_string = "&".join([f"{k}={v}" for k, v in params.items()])
         return f"{self.authorize_url}?{query_string}"
     
-    async def exchange_code_for_token(self, code: str, platform: Literal["web", "mobile"] = "web") -> Optional[str]:
+    async def exchange_code(self, code: str, platform: Literal["web", "mobile"] = "web") -> Optional[Dict]:
         if platform == "web":
             client_id = self.client_id_web
             client_secret = self.client_secret_web
@@ -49,44 +62,112 @@ class GitHubOAuth:
             redirect_uri = self.redirect_uri_mobile
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.token_url,data={"client_id": client_id,"client_secret": client_secret,"code": code,
-                                                                  "redirect_uri": redirect_uri,},headers={"Accept": "application/json"}) 
-                if response.status_code == 200:
-                    data = response.json()
-                    access_token = data.get("access_token")
-                    if access_token:
-                        logger.info(f"Successfully obtained GitHub access token for platform: {platform}")
-                        return access_token
-                    else:
-                        logger.error(f"No access token in response: {data}")
-                        return None
+            client = http_clients.get(self.token_url)
+            response = await client.post(self.token_url,data={"client_id": client_id,"client_secret": client_secret,"code": code,
+                                                              "redirect_uri": redirect_uri,},headers={"Accept": "application/json"}) 
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("access_token"):
+                    logger.info(f"Successfully obtained GitHub access token for platform: {platform}")
+                    return data
                 else:
-                    logger.error(f"Failed to get access token: {response.status_code} - {response.text}")
-                    return None    
+                    logger.error(f"No access token in response: {data.get('error')}")
+                    return None
+            else:
+                logger.error(f"Failed to get access token: {response.status_code} - {response.text}")
+                return None    
         except Exception as e:
             logger.error(f"Error exchanging code for token: {str(e)}")
             return None
-    async def get_user_info(self, access_token: str) -> Optional[Dict]:
+
+    async def exchange_code_for_token(self, code: str, platform: Literal["web", "mobile"] = "web") -> Optional[str]:
+        data = await self.exchange_code(code, platform)
+        return data["access_token"] if data else None
+
+    @staticmethod
+    def _record_rate_limit(response):
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        rate_limit_remaining.set(int(headers["X-RateLimit-Remaining"]), resource=resource)
+        rate_limit_limit.set(int(headers.get("X-RateLimit-Limit", 0)), resource=resource)
+        rate_limit_reset.set(max(0, int(headers.get("X-RateLimit-Reset", 0)) - int(time.time())), resource=resource)
+
+    @staticmethod
+    def _cache_key(github_id, endpoint: str) -> str:
+        return f"{ETAG_PREFIX}{github_id}:{endpoint}"
+
+    async def _cached(self, github_id, endpoint: str) -> Optional[Dict]:
+        if github_id is None:
+            return None
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {"Authorization": f"Bearer {access_token}","Accept": "application/json"}
-                user_response = await client.get(self.user_api_url, headers=headers)
-                if user_response.status_code != 200:
-                    logger.error(f"Failed to get user info: {user_response.status_code}")
-                    return None
-                user_data = user_response.json()
-                if not user_data.get("email"):
-                    emails_response = await client.get(self.user_emails_url, headers=headers)
-                    if emails_response.status_code == 200:
-                        emails = emails_response.json()
-                        for email_obj in emails:
-                            if email_obj.get("primary") and email_obj.get("verified"):
-                                user_data["email"] = email_obj["email"]
-                                break
-                logger.info(f"Successfully retrieved user info for GitHub ID: {user_data.get('id')}")
-                return {"id": user_data.get("id"),"login": user_data.get("login"),"email": user_data.get("email"),
-                        "name": user_data.get("name"),}  
+            return await async_redis_client.client.hgetall(self._cache_key(github_id, endpoint)) or None
+        except Exception as e:
+            logger.error(f"Failed to read GitHub ETag cache: {str(e)}")
+            return None
+
+    async def _store(self, github_id, entries):
+        entries = [(endpoint, etag, body) for endpoint, etag, body in entries if etag]
+        if github_id is None or not entries:
+            return
+        try:
+            pipe = async_redis_client.pipeline(transaction=True)
+            for endpoint, etag, body in entries:
+                key = self._cache_key(github_id, endpoint)
+                pipe.hset(key, mapping={"etag": etag, "body": json.dumps(body)})
+                pipe.expire(key, settings.GITHUB_ETAG_TTL_SECONDS)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to write GitHub ETag cache: {str(e)}")
+
+    async def _fetch(self, url: str, endpoint: str, headers: Dict, github_id=None) -> Tuple[int, Optional[object], Optional[str]]:
+        cached = await self._cached(github_id, endpoint)
+        request_headers = dict(headers)
+        if cached:
+            request_headers["If-None-Match"] = cached["etag"]
+        response = await http_clients.get(url).get(url, headers=request_headers)
+        self._record_rate_limit(response)
+        if response.status_code == 304 and cached:
+            conditional_requests.inc(endpoint=endpoint, result="not_modified")
+            return 200, json.loads(cached["body"]), cached["etag"]
+        conditional_requests.inc(endpoint=endpoint, result="fetched" if cached else "uncached")
+        if response.status_code != 200:
+            return response.status_code, None, None
+        return 200, response.json(), response.headers.get("ETag")
+
+    @staticmethod
+    def _primary_email(emails) -> Optional[str]:
+        for email_obj in emails or []:
+            if email_obj.get("primary") and email_obj.get("verified"):
+                return email_obj["email"]
+        return None
+
+    async def get_user_info(self, access_token: str, scope: Optional[str] = None, github_id: Optional[int] = None) -> Optional[Dict]:
+        try:
+            headers = {"Authorization": f"Bearer {access_token}","Accept": "application/json"}
+            scopes = {item.strip() for item in (scope or "").split(",")}
+            emails = None
+            if scopes.intersection(EMAIL_SCOPES):
+                (status_code, user_data, user_etag), (emails_status, emails, emails_etag) = await asyncio.gather(
+                    self._fetch(self.user_api_url, "user", headers, github_id),
+                    self._fetch(self.user_emails_url, "emails", headers, github_id))
+            else:
+                status_code, user_data, user_etag = await self._fetch(self.user_api_url, "user", headers, github_id)
+            if status_code != 200:
+                logger.error(f"Failed to get user info: {status_code}")
+                return None
+            if not user_data.get("email") and emails is None:
+                emails_status, emails, emails_etag = await self._fetch(self.user_emails_url, "emails", headers, user_data.get("id"))
+            entries = [("user", user_etag, user_data)]
+            if emails is not None:
+                entries.append(("emails", emails_etag, emails))
+            await self._store(user_data.get("id"), entries)
+            if not user_data.get("email"):
+                user_data["email"] = self._primary_email(emails)
+            logger.info(f"Successfully retrieved user info for GitHub ID: {user_data.get('id')}")
+            return {"id": user_data.get("id"),"login": user_data.get("login"),"email": user_data.get("email"),
+                    "name": user_data.get("name"),}  
         except Exception as e:
             logger.error(f"Error getting user info: {str(e)}")
             return None
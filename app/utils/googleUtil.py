@@ -1,7 +1,11 @@
-import httpx
 from functools import lru_cache
 from app import config
+from app.utils.httpUtil import http_clients
 from typing import Optional, Dict, Literal
+import asyncio
+import re
+import time
+import jwt as pyjwt
 import logging
 from urllib.parse import urlencode
 
@@ -13,6 +17,64 @@ def get_settings():
 
 settings = get_settings()
 
+ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+MIN_REFRESH_INTERVAL = 60
+DEFAULT_MAX_AGE = 3600
+
+class GoogleJWKS:
+    def __init__(self, url: str):
+        self.url = url
+        self.keys: Dict[str, pyjwt.PyJWK] = {}
+        self.expires_at = 0.0
+        self.refresh_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+        self._background = None
+
+    @staticmethod
+    def max_age(cache_control: str) -> int:
+        match = re.search(r"max-age=(\d+)", cache_control or "")
+        return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+    async def refresh(self, force: bool = False):
+        async with self._lock:
+            now = time.monotonic()
+            if not force and now < self.refresh_at:
+                return
+            if now - self._last_fetch < MIN_REFRESH_INTERVAL and self.keys:
+                return
+            self._last_fetch = now
+            response = await http_clients.get(self.url).get(self.url)
+            response.raise_for_status()
+            keys = {key.key_id: key for key in pyjwt.PyJWKSet.from_dict(response.json()).keys if key.key_id}
+            max_age = self.max_age(response.headers.get("Cache-Control"))
+            self.keys = keys
+            self.expires_at = now + max_age
+            self.refresh_at = now + max_age * 0.8
+            logger.info(f"Loaded {len(keys)} Google signing keys, cached for {max_age}s")
+
+    def _refresh_in_background(self):
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._safe_refresh())
+
+    async def _safe_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Background refresh of Google signing keys failed: {str(e)}")
+
+    async def get_key(self, kid: str) -> pyjwt.PyJWK:
+        now = time.monotonic()
+        if now >= self.expires_at:
+            await self.refresh(force=True)
+        elif now >= self.refresh_at:
+            self._refresh_in_background()
+        if kid not in self.keys:
+            await self.refresh(force=True)
+        if kid not in self.keys:
+            raise pyjwt.InvalidTokenError(f"Unknown Google signing key: {kid}")
+        return self.keys[kid]
+
 class GoogleOAuth:
     def __init__(self):
         self.client_id_web = settings.GOOGLE_CLIENT_ID
@@ -22,6 +84,8 @@ class GoogleOAuth:
         self.authorize_url = "https://accounts.google.com/o/oauth2/v2/auth"
         self.token_url = "https://oauth2.googleapis.com/token"
         self.user_info_url = "https://www.googleapis.com/oauth2/v2/userinfo"
+        self.certs_url = "https://www.googleapis.com/oauth2/v3/certs"
+        self.jwks = GoogleJWKS(self.certs_url)
 
     def get_authorization_url(self,state: Optional[str] = None,platform: Literal["web", "mobile"] = "web") -> str:
         client_id = self.client_id_web
@@ -31,31 +95,55 @@ class GoogleOAuth:
         if state:
             params["state"] = state
         return f"{self.authorize_url}?{urlencode(params)}"
-    async def exchange_code_for_token(self,code: str,platform: Literal["web", "mobile"] = "web") -> Optional[str]:
+    async def exchange_code(self,code: str,platform: Literal["web", "mobile"] = "web") -> Optional[Dict]:
         client_id = self.client_id_web
         client_secret = self.client_secret_web
         redirect_uri = (self.redirect_uri_web if platform == "web"else self.redirect_uri_mobile)
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.token_url,data={"client_id": client_id,"client_secret": client_secret,"code": code,
-                                                                  "redirect_uri": redirect_uri,"grant_type": "authorization_code",},headers={"Accept": "application/json"},)
+            client = http_clients.get(self.token_url)
+            response = await client.post(self.token_url,data={"client_id": client_id,"client_secret": client_secret,"code": code,
+                                                              "redirect_uri": redirect_uri,"grant_type": "authorization_code",},headers={"Accept": "application/json"},)
             if response.status_code != 200:
                 logger.error(f"Google token exchange failed: {response.status_code} - {response.text}")
                 return None
             data = response.json()
-            access_token = data.get("access_token")
-            if not access_token:
-                logger.error(f"No access token in response: {data}")
+            if not data.get("access_token"):
+                logger.error(f"No access token in response: {data.get('error')}")
                 return None
             logger.info(f"Google access token obtained (platform={platform})")
-            return access_token
+            return data
         except Exception as e:
             logger.exception("Error exchanging Google auth code")
             return None
+
+    async def exchange_code_for_token(self,code: str,platform: Literal["web", "mobile"] = "web") -> Optional[str]:
+        data = await self.exchange_code(code, platform)
+        return data["access_token"] if data else None
+
+    async def verify_id_token(self, id_token: str) -> Dict:
+        kid = pyjwt.get_unverified_header(id_token).get("kid")
+        key = await self.jwks.get_key(kid)
+        return pyjwt.decode(id_token, key.key, algorithms=["RS256"], audience=self.client_id_web, issuer=ISSUERS,
+                            leeway=30, options={"require": ["exp", "iat", "sub", "aud", "iss"]})
+
+    async def get_user(self, token: Dict) -> Optional[Dict]:
+        if token.get("id_token"):
+            try:
+                claims = await self.verify_id_token(token["id_token"])
+                if claims.get("email"):
+                    return {"id": claims["sub"],"email": claims["email"],"name": claims.get("name"),
+                            "picture": claims.get("picture"),"verified_email": claims.get("email_verified", False),}
+            except pyjwt.InvalidTokenError as e:
+                logger.error(f"Rejected Google id_token: {str(e)}")
+                return None
+            except Exception as e:
+                logger.error(f"Could not verify Google id_token locally, using userinfo: {str(e)}")
+        return await self.get_user_info(token["access_token"])
+
     async def get_user_info(self, access_token: str) -> Optional[Dict]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.user_info_url,headers={"Authorization": f"Bearer {access_token}","Accept": "application/json",},)
+            client = http_clients.get(self.user_info_url)
+            response = await client.get(self.user_info_url,headers={"Authorization": f"Bearer {access_token}","Accept": "application/json",},)
             if response.status_code != 200:
                 logger.error(f"Failed to get Google user info: {response.status_code}")
                 return None
@@ -0,0 +1,145 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Dict
+from urllib.parse import urlsplit
+import httpx
+from app import config
+from app.utils.metricsUtil import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+request_latency = registry.histogram("http_client_request_seconds", "Outbound HTTP request latency", ["host", "status"])
+request_errors = registry.counter("http_client_errors_total", "Outbound HTTP requests that failed without a response", ["host"])
+pool_connections = registry.gauge("http_client_pool_connections", "Outbound connections held per host pool", ["host", "client", "state"])
+
+def origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _started(request: httpx.Request):
+    request.extensions["started_at"] = time.perf_counter()
+
+def _finished(response: httpx.Response):
+    started = response.request.extensions.get("started_at")
+    if started is not None:
+        request_latency.observe(time.perf_counter() - started, host=response.request.url.host, status=response.status_code)
+
+async def _started_async(request: httpx.Request):
+    _started(request)
+
+async def _finished_async(response: httpx.Response):
+    _finished(response)
+
+class _ErrorCountingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            return await self.transport.handle_async_request(request)
+        except httpx.TransportError:
+            request_errors.inc(host=request.url.host)
+            raise
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class _SyncErrorCountingTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.HTTPTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            return self.transport.handle_request(request)
+        except httpx.TransportError:
+            request_errors.inc(host=request.url.host)
+            raise
+
+    def close(self):
+        self.transport.close()
+
+class HttpClients:
+    def __init__(self):
+        self.http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+        self.timeout = httpx.Timeout(connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT, read=settings.HTTP_CLIENT_READ_TIMEOUT,
+                                     write=settings.HTTP_CLIENT_READ_TIMEOUT, pool=settings.HTTP_CLIENT_POOL_TIMEOUT)
+        self.limits = httpx.Limits(max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                                   max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                                   keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY)
+        self._async: Dict[str, httpx.AsyncClient] = {}
+        self._sync: Dict[str, httpx.Client] = {}
+        self._transports: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if settings.HTTP_CLIENT_HTTP2 and not HTTP2_AVAILABLE:
+            logger.warning("h2 is not installed, outbound HTTP clients fall back to HTTP/1.1")
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        key = origin(url)
+        client = self._async.get(key)
+        if client is None:
+            with self._lock:
+                client = self._async.get(key)
+                if client is None:
+                    transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits, retries=1)
+                    client = httpx.AsyncClient(base_url=key, timeout=self.timeout, transport=_ErrorCountingTransport(transport),
+                                               event_hooks={"request": [_started_async], "response": [_finished_async]})
+                    self._async[key] = client
+                    self._transports[("async", key)] = transport
+        return client
+
+    def get_sync(self, url: str) -> httpx.Client:
+        key = origin(url)
+        client = self._sync.get(key)
+        if client is None:
+            with self._lock:
+                client = self._sync.get(key)
+                if client is None:
+                    transport = httpx.HTTPTransport(http2=self.http2, limits=self.limits, retries=1)
+                    client = httpx.Client(base_url=key, timeout=self.timeout, transport=_SyncErrorCountingTransport(transport),
+                                          event_hooks={"request": [_started], "response": [_finished]})
+                    self._sync[key] = client
+                    self._transports[("sync", key)] = transport
+        return client
+
+    def open(self, *urls: str):
+        for url in urls:
+            self.get(url)
+
+    def collect(self):
+        for (kind, key), transport in list(self._transports.items()):
+            connections = getattr(getattr(transport, "_pool", None), "connections", [])
+            idle = sum(1 for connection in connections if connection.is_idle())
+            host = urlsplit(key).hostname
+            pool_connections.set(idle, host=host, client=kind, state="idle")
+            pool_connections.set(len(connections) - idle, host=host, client=kind, state="active")
+
+    async def aclose(self):
+        with self._lock:
+            clients, self._async = list(self._async.values()), {}
+            self._transports = {key: value for key, value in self._transports.items() if key[0] != "async"}
+        for client in clients:
+            await client.aclose()
+
+    def close(self):
+        with self._lock:
+            clients, self._sync = list(self._sync.values()), {}
+            self._transports = {key: value for key, value in self._transports.items() if key[0] != "sync"}
+        for client in clients:
+            client.close()
+
+http_clients = HttpClients()
+registry.add_collector(http_clients.collect)
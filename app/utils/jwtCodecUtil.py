@@ -0,0 +1,162 @@
+import hashlib
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+import jwt as pyjwt
+from jose import jwt as jose_jwt
+from jose import JWTError
+from jose.constants import ALGORITHMS
+
+class TokenError(Exception):
+    pass
+
+class _Codec(ABC):
+    name = ""
+
+    def __init__(self, algorithm: str, signing_key, verify_keys: Optional[Dict] = None, kid: Optional[str] = None):
+        self.algorithm = algorithm
+        self.algorithms = [algorithm]
+        self.kid = kid
+        self.headers = {"kid": kid} if kid else None
+        self.signing_key = self.prepare_key(signing_key)
+        if verify_keys is None:
+            verify_keys = {kid: signing_key}
+        self.verify_keys = {key_id: self.prepare_key(key) for key_id, key in verify_keys.items()}
+        self._single_key = next(iter(self.verify_keys.values())) if len(self.verify_keys) == 1 else None
+
+    def prepare_key(self, key):
+        return key
+
+    @abstractmethod
+    def unverified_header(self, token: str) -> Dict:
+        ...
+
+    @abstractmethod
+    def encode(self, claims: Dict) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str) -> Dict:
+        ...
+
+    def verify_key(self, token: str):
+        if self._single_key is not None and not self.kid:
+            return self._single_key
+        try:
+            kid = self.unverified_header(token).get("kid")
+        except Exception as e:
+            raise TokenError(str(e)) from e
+        if kid not in self.verify_keys:
+            raise TokenError(f"Unknown signing key: {kid}")
+        return self.verify_keys[kid]
+
+class JoseCodec(_Codec):
+    name = "jose"
+    _options = {"require_exp": True}
+
+    def __init__(self, algorithm: str, signing_key, verify_keys: Optional[Dict] = None, kid: Optional[str] = None):
+        if algorithm not in ALGORITHMS.SUPPORTED:
+            raise ValueError(f"python-jose does not support {algorithm}")
+        super().__init__(algorithm, signing_key, verify_keys, kid)
+
+    def unverified_header(self, token: str) -> Dict:
+        return jose_jwt.get_unverified_header(token)
+
+    def encode(self, claims: Dict) -> str:
+        return jose_jwt.encode(claims, self.signing_key, algorithm=self.algorithm, headers=self.headers)
+
+    def decode(self, token: str) -> Dict:
+        key = self.verify_key(token)
+        try:
+            return jose_jwt.decode(token, key, algorithms=self.algorithms, options=self._options)
+        except JWTError as e:
+            raise TokenError(str(e)) from e
+
+class PyJWTCodec(_Codec):
+    name = "pyjwt"
+    _options = {"require": ["exp"]}
+
+    def __init__(self, algorithm: str, signing_key, verify_keys: Optional[Dict] = None, kid: Optional[str] = None):
+        self._algorithm = pyjwt.get_algorithm_by_name(algorithm)
+        self._jwt = pyjwt.PyJWT()
+        super().__init__(algorithm, signing_key, verify_keys, kid)
+
+    def prepare_key(self, key):
+        return self._algorithm.prepare_key(key)
+
+    def unverified_header(self, token: str) -> Dict:
+        return pyjwt.get_unverified_header(token)
+
+    def encode(self, claims: Dict) -> str:
+        return self._jwt.encode(claims, self.signing_key, algorithm=self.algorithm, headers=self.headers)
+
+    def decode(self, token: str) -> Dict:
+        key = self.verify_key(token)
+        try:
+            return self._jwt.decode(token, key, algorithms=self.algorithms, options=self._options)
+        except pyjwt.PyJWTError as e:
+            raise TokenError(str(e)) from e
+
+CODECS = {JoseCodec.name: JoseCodec, PyJWTCodec.name: PyJWTCodec}
+
+def build_codec(backend: str, algorithm: str, signing_key, verify_keys: Optional[Dict] = None, kid: Optional[str] = None):
+    if backend not in CODECS:
+        raise ValueError(f"Unknown JWT backend: {backend}")
+    return CODECS[backend](algorithm, signing_key, verify_keys, kid)
+
+class VerifiedClaimsCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        if self.maxsize <= 0:
+            return None
+        key = self.key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims["exp"] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return dict(claims)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def put(self, token: str, claims: Dict):
+        if self.maxsize <= 0 or "exp" not in claims:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = dict(claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+class CachingDecoder:
+    def __init__(self, codec, maxsize: int):
+        self.codec = codec
+        self.cache = VerifiedClaimsCache(maxsize)
+
+    def use(self, codec):
+        self.codec = codec
+        self.cache.clear()
+
+    def decode(self, token: str) -> Dict:
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+        claims = self.codec.decode(token)
+        self.cache.put(token, claims)
+        return claims
@@ -0,0 +1,200 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, List
+import jwt as pyjwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from sqlalchemy import func
+from app.auth.models import JWTSigningKey
+from app.utils.jwtCodecUtil import build_codec
+import logging
+
+logger = logging.getLogger(__name__)
+
+THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+EC_CURVES = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}
+ROTATION_LOCK = 0x6a776b73
+
+def is_symmetric(algorithm: str) -> bool:
+    return algorithm.upper().startswith("HS")
+
+def generate_private_key(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm in EC_CURVES:
+        return ec.generate_private_key(EC_CURVES[algorithm]())
+    if algorithm[:2] in ("RS", "PS"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+@dataclass
+class SigningKey:
+    kid: str
+    not_before: int
+    private_key: object
+    public_jwk: Dict
+
+class Keyring:
+    def __init__(self, algorithm: str, backend: str, secret: str, session_factory, keys_dir: str, encryption_key: str,
+                 rotation_days: int, max_token_lifetime: timedelta, publish_ahead: int, reload_seconds: int):
+        self.algorithm = algorithm
+        self.backend = backend
+        self.secret = secret
+        self.session_factory = session_factory
+        self.keys_dir = keys_dir
+        self.encryption_key = encryption_key.encode()
+        self.rotation_seconds = rotation_days * 86400
+        self.max_token_lifetime = int(max_token_lifetime.total_seconds())
+        self.publish_ahead = publish_ahead
+        self.reload_seconds = reload_seconds
+        self.symmetric = is_symmetric(algorithm)
+        self.keys: List[SigningKey] = []
+        self.codec = None
+        self._lock = threading.Lock()
+        self._next_reload = 0.0
+        self._listeners = []
+        self._jwk_algorithm = None if self.symmetric else pyjwt.get_algorithm_by_name(algorithm)
+
+    def on_reload(self, listener):
+        self._listeners.append(listener)
+
+    def start(self):
+        if not self.symmetric:
+            self.rotate()
+        self.load()
+
+    def _public_jwk(self, kid: str, private_key) -> Dict:
+        jwk = self._jwk_algorithm.to_jwk(private_key.public_key(), as_dict=True)
+        jwk.update({"kid": kid, "use": "sig", "alg": self.algorithm})
+        return jwk
+
+    @staticmethod
+    def thumbprint(private_key, jwk_algorithm) -> str:
+        jwk = jwk_algorithm.to_jwk(private_key.public_key(), as_dict=True)
+        members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk["kty"]]}
+        digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def _encrypt(self, private_key) -> str:
+        return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                         serialization.BestAvailableEncryption(self.encryption_key)).decode()
+
+    def _read_keys(self) -> List[SigningKey]:
+        db = self.session_factory()
+        try:
+            rows = (db.query(JWTSigningKey.not_before, JWTSigningKey.private_key)
+                    .filter(JWTSigningKey.algorithm == self.algorithm).order_by(JWTSigningKey.not_before).all())
+        finally:
+            db.close()
+        keys = []
+        for not_before, pem in rows:
+            try:
+                private_key = serialization.load_pem_private_key(pem.encode(), password=self.encryption_key)
+            except Exception as e:
+                logger.error(f"Skipping unreadable signing key {not_before}: {str(e)}")
+                continue
+            kid = self.thumbprint(private_key, self._jwk_algorithm)
+            keys.append(SigningKey(kid=kid, not_before=not_before, private_key=private_key,
+                                   public_jwk=self._public_jwk(kid, private_key)))
+        return keys
+
+    def load(self):
+        if self.symmetric:
+            codec = build_codec(self.backend, self.algorithm, self.secret)
+        else:
+            keys = self._read_keys()
+            now = int(time.time())
+            active = [k for k in keys if k.not_before <= now] or keys[:1]
+            if not active:
+                raise RuntimeError(f"No {self.algorithm} signing keys found in the database")
+            signer = active[-1]
+            if self.codec is not None and self.codec.kid == signer.kid and \
+                    [k.kid for k in keys] == [k.kid for k in self.keys]:
+                self._next_reload = time.monotonic() + self.reload_seconds
+                return
+            verify_keys = {k.kid: k.private_key.public_key() for k in keys}
+            codec = build_codec(self.backend, self.algorithm, signer.private_key, verify_keys, kid=signer.kid)
+            with self._lock:
+                self.keys = keys
+            logger.info(f"Loaded {len(keys)} signing keys, active kid: {signer.kid}")
+        self.codec = codec
+        self._next_reload = time.monotonic() + self.reload_seconds
+        for listener in self._listeners:
+            listener(codec)
+
+    def maybe_reload(self):
+        if self.codec is None:
+            self.load()
+            return
+        if self.symmetric or time.monotonic() < self._next_reload:
+            return
+        self._next_reload = time.monotonic() + self.reload_seconds
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Failed to reload signing keys: {str(e)}")
+
+    def rotate(self):
+        if not self.encryption_key:
+            raise RuntimeError("JWT_KEY_ENCRYPTION_KEY must be set to store asymmetric signing keys")
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                db.execute(func.pg_advisory_xact_lock(ROTATION_LOCK))
+            self._rotate_locked(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _legacy_keys(self) -> Dict[int, str]:
+        if not os.path.isdir(self.keys_dir):
+            return {}
+        keys = {}
+        for name in os.listdir(self.keys_dir):
+            if name.endswith(".pem") and name[:-4].isdigit():
+                with open(os.path.join(self.keys_dir, name), "rb") as f:
+                    keys[int(name[:-4])] = self._encrypt(serialization.load_pem_private_key(f.read(), password=None))
+        return keys
+
+    def _rotate_locked(self, db):
+        now = int(time.time())
+        rows = {row.not_before: row for row in
+                db.query(JWTSigningKey).filter(JWTSigningKey.algorithm == self.algorithm).all()}
+        if not rows:
+            for not_before, pem in self._legacy_keys().items():
+                rows[not_before] = JWTSigningKey(not_before=not_before, algorithm=self.algorithm, private_key=pem)
+                db.add(rows[not_before])
+                logger.info(f"Imported signing key {not_before}.pem from {self.keys_dir}")
+            db.flush()
+        stamps = sorted(rows)
+        newest = stamps[-1] if stamps else None
+        if newest is None or now - newest >= self.rotation_seconds - self.publish_ahead:
+            not_before = now if newest is None else max(now + self.publish_ahead, newest + 1)
+            db.add(JWTSigningKey(not_before=not_before, algorithm=self.algorithm,
+                                 private_key=self._encrypt(generate_private_key(self.algorithm))))
+            stamps.append(not_before)
+            logger.info(f"Generated signing key {not_before}")
+        for current, successor in zip(stamps, stamps[1:]):
+            if successor + self.max_token_lifetime < now:
+                db.delete(rows[current])
+                logger.info(f"Retired signing key {current}")
+
+    def jwks(self) -> Dict:
+        with self._lock:
+            return {"keys": [k.public_jwk for k in self.keys]}
+
+def build_keyring(settings, session_factory, max_token_lifetime: timedelta) -> Keyring:
+    return Keyring(algorithm=settings.JWT_ALGORITHM, backend=settings.JWT_BACKEND, secret=settings.JWT_SECRET_KEY,
+                   session_factory=session_factory, keys_dir=settings.JWT_KEYS_DIR,
+                   encryption_key=settings.JWT_KEY_ENCRYPTION_KEY, rotation_days=settings.JWT_KEY_ROTATION_DAYS,
+                   max_token_lifetime=max_token_lifetime, publish_ahead=settings.JWKS_CACHE_SECONDS,
+                   reload_seconds=settings.JWT_KEY_RELOAD_SECONDS)
@@ -0,0 +1,112 @@
+import secrets
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy.orm import Session
+from app import config
+from app.auth import crud
+from app.utils.redisUtils import redis_client
+from app.utils.emailUtil import send_otp_email
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+OTP_TTL_SECONDS = 600
+OTP_MAX_ATTEMPTS = 5
+OTP_LOCK_SECONDS = 600
+
+CREATE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'locked') == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0, 'max', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+VERIFY_SCRIPT = """
+local data = redis.call('HMGET', KEYS[1], 'code', 'attempts', 'max', 'locked')
+if data[4] then
+    return {0, 0, 'locked'}
+end
+if not data[1] then
+    return {0, 0, 'expired'}
+end
+if data[1] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return {1, 0, 'ok'}
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+local max = tonumber(data[3])
+if attempts >= max then
+    redis.call('HDEL', KEYS[1], 'code')
+    redis.call('HSET', KEYS[1], 'locked', 1)
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return {0, 0, 'locked'}
+end
+return {0, max - attempts, 'invalid'}
+"""
+
+class SqlOTPStore:
+    def is_locked(self, db: Session, email: str, purpose: str) -> tuple:
+        return crud.is_otp_locked(db, email, purpose)
+
+    def create(self, db: Session, email: str, purpose: str, username: str = "User") -> Optional[str]:
+        return crud.create_otp(db, email, purpose, notify=lambda otp: send_otp_email(db, email, otp, purpose, username))
+
+    def verify(self, db: Session, email: str, otp: str, purpose: str) -> tuple:
+        return crud.verify_and_delete_otp(db, email, otp, purpose)
+
+    def delete(self, db: Session, email: str, purpose: str):
+        return crud.delete_otp_email(db, email, purpose)
+
+class RedisOTPStore:
+    def __init__(self):
+        self._create = redis_client.client.register_script(CREATE_SCRIPT)
+        self._verify = redis_client.client.register_script(VERIFY_SCRIPT)
+
+    @staticmethod
+    def key(email: str, purpose: str) -> str:
+        return f"otp:{purpose}:{email}"
+
+    def is_locked(self, db: Session, email: str, purpose: str) -> tuple:
+        key = self.key(email, purpose)
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.hexists(key, "locked")
+        pipe.ttl(key)
+        locked, ttl = pipe.execute()
+        if locked:
+            return (True, max(0, int(ttl / 60)))
+        return (False, 0)
+
+    def create(self, db: Session, email: str, purpose: str, username: str = "User") -> Optional[str]:
+        otp_code = str(100000 + secrets.randbelow(900000))
+        if not self._create(keys=[self.key(email, purpose)], args=[otp_code, OTP_TTL_SECONDS, OTP_MAX_ATTEMPTS]):
+            return None
+        send_otp_email(db, email, otp_code, purpose, username)
+        db.commit()
+        return otp_code
+
+    def verify(self, db: Session, email: str, otp: str, purpose: str) -> tuple:
+        valid, remaining, outcome = self._verify(keys=[self.key(email, purpose)], args=[otp, OTP_LOCK_SECONDS])
+        if valid:
+            return (True, 0, None)
+        if outcome == "locked":
+            return (False, 0, "no request until 10 min")
+        if outcome == "expired":
+            return (False, 0, "Invalid or expired OTP")
+        return (False, remaining, "Invalid OTP.")
+
+    def delete(self, db: Session, email: str, purpose: str):
+        return redis_client.client.delete(self.key(email, purpose))
+
+def build_otp_store():
+    if settings.OTP_BACKEND == "redis":
+        return RedisOTPStore()
+    if settings.OTP_BACKEND == "sql":
+        return SqlOTPStore()
+    raise ValueError(f"Unknown OTP backend: {settings.OTP_BACKEND}")
+
+otp_store = build_otp_store()
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple, List
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, tuple_
+from app import config
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+def page_size(limit: Optional[int]) -> int:
+    return max(1, min(limit or settings.PAGINATION_DEFAULT_PAGE_SIZE, settings.PAGINATION_MAX_PAGE_SIZE))
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, columns: Sequence) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the listing")
+        return [datetime.fromisoformat(value) if isinstance(column.type, DateTime) else column.type.python_type(value)
+                for column, value in zip(columns, values)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor") from e
+
+def keyset_page(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = False) -> Tuple[List, Optional[str]]:
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+    rows = query.order_by(*[column.desc() if descending else column.asc() for column in columns]).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
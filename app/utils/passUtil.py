@@ -1,9 +1,187 @@
 from passlib.context import CryptContext
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from fastapi import HTTPException,status
+from app import config
+from app.utils.metricsUtil import registry
+import asyncio
+import math
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import logging
+
+logger=logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+SCHEMES=("bcrypt","argon2")
+BCRYPT_MIN_ROUNDS=10
+BCRYPT_MAX_ROUNDS=16
+ARGON2_MIN_TIME_COST=2
+CALIBRATION_TTL=86400
+
+def build_context(scheme:str,cost:int,argon2_memory_kb:int=65536)->CryptContext:
+    options={}
+    if scheme=="bcrypt":
+        options.update(bcrypt__default_rounds=cost,bcrypt__min_rounds=cost)
+    else:
+        options.update(argon2__time_cost=cost,argon2__min_rounds=cost,argon2__memory_cost=argon2_memory_kb,
+                       argon2__parallelism=1)
+    return CryptContext(schemes=[scheme]+[s for s in SCHEMES if s!=scheme],deprecated="auto",**options)
 
 pwd_context=CryptContext(schemes=["bcrypt"],deprecated="auto")
 
+queue_wait=registry.histogram("password_queue_wait_seconds","Time password jobs wait for a pool worker",["op"])
+hash_time=registry.histogram("password_hash_seconds","Time spent hashing or verifying inside a pool worker",["op"])
+pending_jobs=registry.gauge("password_pool_pending","Password jobs queued or running in the pool")
+rejected_jobs=registry.counter("password_pool_rejected_total","Password jobs rejected because the pool was saturated",["op"])
+
 def hash_pwd(pwd:str)->str:
     return pwd_context.hash(pwd)
 
 def verify_pass(plain_pass:str,hashed_pass:str)->bool:
-    return pwd_context.verify(plain_pass,hashed_pass)
\ No newline at end of file
+    return pwd_context.verify(plain_pass,hashed_pass)
+
+def configure(scheme:str,cost:int,argon2_memory_kb:int):
+    global pwd_context
+    pwd_context=build_context(scheme,cost,argon2_memory_kb)
+
+def _measure(context:CryptContext)->float:
+    started=time.perf_counter()
+    context.hash("calibration-Passw0rd!")
+    return time.perf_counter()-started
+
+def calibrate(scheme:str,target_ms:int,argon2_memory_kb:int)->int:
+    target=target_ms/1000
+    if scheme=="bcrypt":
+        base=_measure(build_context(scheme,BCRYPT_MIN_ROUNDS))
+        cost=BCRYPT_MIN_ROUNDS+max(0,int(math.floor(math.log2(target/base)))) if base<target else BCRYPT_MIN_ROUNDS
+        return min(cost,BCRYPT_MAX_ROUNDS)
+    base=_measure(build_context(scheme,1,argon2_memory_kb))
+    return max(ARGON2_MIN_TIME_COST,int(target/base))
+
+def calibrated_cost(scheme:str,target_ms:int,argon2_memory_kb:int)->int:
+    from app.utils.redisUtils import redis_client
+    key=f"password:calibration:{socket.gethostname()}:{scheme}:{target_ms}:{argon2_memory_kb}"
+    cached=redis_client.get(key)
+    if cached:
+        return int(cached)
+    cost=calibrate(scheme,target_ms,argon2_memory_kb)
+    if not redis_client.client.set(key,cost,nx=True,ex=CALIBRATION_TTL):
+        cost=int(redis_client.get(key) or cost)
+    return cost
+
+def _timed(fn,*args):
+    started=time.monotonic()
+    result=fn(*args)
+    return result,started,time.monotonic()-started
+
+def _hash_job(pwd:str):
+    return _timed(hash_pwd,pwd)
+
+def _verify_job(plain_pass:str,hashed_pass:str):
+    return _timed(verify_pass,plain_pass,hashed_pass)
+
+def _verify_and_update_job(plain_pass:str,hashed_pass:str):
+    return _timed(pwd_context.verify_and_update,plain_pass,hashed_pass)
+
+class PasswordService:
+    def __init__(self,workers:int,max_pending:int):
+        self.workers=workers or os.cpu_count() or 1
+        self.max_pending=max_pending or self.workers*2
+        self.params=None
+        self._executor=None
+        self._pending=0
+        self._lock=threading.Lock()
+
+    def calibrate(self):
+        settings=get_settings()
+        scheme=settings.PASSWORD_HASH_SCHEME
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unsupported password hash scheme: {scheme}")
+        cost=settings.PASSWORD_HASH_COST
+        if not cost:
+            try:
+                cost=calibrated_cost(scheme,settings.PASSWORD_HASH_TARGET_MS,settings.ARGON2_MEMORY_KB)
+            except Exception as e:
+                logger.error(f"Shared password calibration failed, calibrating locally: {str(e)}")
+                cost=calibrate(scheme,settings.PASSWORD_HASH_TARGET_MS,settings.ARGON2_MEMORY_KB)
+        self.params=(scheme,cost,settings.ARGON2_MEMORY_KB)
+        configure(*self.params)
+        logger.info(f"Password hashing uses {scheme} with cost {cost} (target {settings.PASSWORD_HASH_TARGET_MS} ms)")
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                if self.params is None:
+                    self.calibrate()
+                self._executor=ProcessPoolExecutor(max_workers=self.workers,mp_context=multiprocessing.get_context("spawn"),
+                                                   initializer=configure,initargs=self.params)
+                logger.info(f"Password pool started with {self.workers} workers")
+
+    def shutdown(self):
+        with self._lock:
+            executor,self._executor=self._executor,None
+        if executor is not None:
+            executor.shutdown(wait=False,cancel_futures=True)
+
+    def _release(self,future:Future):
+        with self._lock:
+            self._pending-=1
+            pending_jobs.set(self._pending)
+
+    def _submit(self,op:str,job,*args)->tuple:
+        if self._executor is None:
+            self.start()
+        with self._lock:
+            if self._pending>=self.max_pending:
+                rejected_jobs.inc(op=op)
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,detail="Server busy, please retry",
+                                    headers={"Retry-After":"1"})
+            self._pending+=1
+            pending_jobs.set(self._pending)
+        submitted=time.monotonic()
+        try:
+            future=self._executor.submit(job,*args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future,submitted
+
+    def _observe(self,op:str,submitted:float,outcome:tuple):
+        result,started,elapsed=outcome
+        queue_wait.observe(max(0.0,started-submitted),op=op)
+        hash_time.observe(elapsed,op=op)
+        return result
+
+    async def hash(self,pwd:str)->str:
+        future,submitted=self._submit("hash",_hash_job,pwd)
+        return self._observe("hash",submitted,await asyncio.wrap_future(future))
+
+    async def verify(self,plain_pass:str,hashed_pass:str)->bool:
+        future,submitted=self._submit("verify",_verify_job,plain_pass,hashed_pass)
+        return self._observe("verify",submitted,await asyncio.wrap_future(future))
+
+    async def verify_and_update(self,plain_pass:str,hashed_pass:str)->tuple:
+        future,submitted=self._submit("verify",_verify_and_update_job,plain_pass,hashed_pass)
+        return self._observe("verify",submitted,await asyncio.wrap_future(future))
+
+    def hash_blocking(self,pwd:str)->str:
+        future,submitted=self._submit("hash",_hash_job,pwd)
+        return self._observe("hash",submitted,future.result())
+
+    def verify_blocking(self,plain_pass:str,hashed_pass:str)->bool:
+        future,submitted=self._submit("verify",_verify_job,plain_pass,hashed_pass)
+        return self._observe("verify",submitted,future.result())
+
+    def verify_and_update_blocking(self,plain_pass:str,hashed_pass:str)->tuple:
+        future,submitted=self._submit("verify",_verify_and_update_job,plain_pass,hashed_pass)
+        return self._observe("verify",submitted,future.result())
+
+password_service=PasswordService(get_settings().PASSWORD_POOL_WORKERS,get_settings().PASSWORD_POOL_MAX_PENDING)
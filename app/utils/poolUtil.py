@@ -0,0 +1,108 @@
+import time
+from functools import lru_cache
+from typing import Optional
+from uuid import uuid4
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app import config
+from app.utils.metricsUtil import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+checkout_wait = registry.histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection", ["engine"])
+checkout_timeouts = registry.counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS", ["engine"])
+connections_in_use = registry.gauge("db_pool_connections_in_use", "Database connections currently checked out", ["engine"])
+connections_overflow = registry.gauge("db_pool_connections_overflow", "Connections open beyond DB_POOL_SIZE", ["engine"])
+connections_idle = registry.gauge("db_pool_connections_idle", "Connections idle in the pool", ["engine"])
+idle_pings = registry.counter("db_pool_idle_pings_total", "Liveness pings issued to connections that sat idle", ["engine", "result"])
+
+class _InstrumentedPool:
+    label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            checkout_timeouts.inc(engine=self.label)
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - started, engine=self.label)
+
+    def collect(self):
+        connections_in_use.set(self.checkedout(), engine=self.label)
+        connections_overflow.set(max(self.overflow(), 0), engine=self.label)
+        connections_idle.set(self.checkedin(), engine=self.label)
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    label = "sync"
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    label = "async"
+
+def _pgbouncer_connect_args(url: str) -> dict:
+    driver = make_url(url).get_driver_name()
+    if driver == "asyncpg":
+        return {"statement_cache_size": 0, "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"}
+    if driver == "psycopg":
+        return {"prepare_threshold": None}
+    return {}
+
+def engine_options(url: str, is_async: bool = False, label: Optional[str] = None) -> dict:
+    if settings.DB_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(f"Unknown DB_POOL_PRE_PING strategy: {settings.DB_POOL_PRE_PING}")
+    poolclass = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    if label:
+        poolclass = type(f"{poolclass.__name__}_{label}", (poolclass,), {"label": label})
+    options = {"poolclass": poolclass,
+               "pool_size": settings.DB_POOL_SIZE,
+               "max_overflow": settings.DB_MAX_OVERFLOW,
+               "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+               "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+               "pool_pre_ping": settings.DB_POOL_PRE_PING == "always"}
+    if settings.DB_PGBOUNCER:
+        options["connect_args"] = _pgbouncer_connect_args(url)
+    return options
+
+def _ping(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+def instrument(engine):
+    label = engine.pool.label
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.pop("checked_in_at", None)
+        if (settings.DB_POOL_PRE_PING == "idle" and checked_in_at is not None
+                and time.monotonic() - checked_in_at > settings.DB_POOL_PRE_PING_IDLE_SECONDS):
+            try:
+                _ping(dbapi_connection)
+                idle_pings.inc(engine=label, result="ok")
+            except Exception as e:
+                idle_pings.inc(engine=label, result="stale")
+                logger.warning(f"Discarding stale {label} database connection: {str(e)}")
+                raise exc.DisconnectionError() from e
+        engine.pool.collect()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+        engine.pool.collect()
+
+    registry.add_collector(lambda: engine.pool.collect())
+    return engine
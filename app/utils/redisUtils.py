@@ -1,6 +1,11 @@
 import redis
+import redis.asyncio as aioredis
 from functools import lru_cache
 from app import config
+from typing import Callable, Dict, List, Optional
+import asyncio
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,11 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {str(e)}")
             raise
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._pubsub = None
+        self._pubsub_thread = None
+        self._listener_lock = threading.Lock()
     
     def set_with_expiry(self, key: str, value: str, expiry_seconds: int) -> bool:
         try:
@@ -55,4 +65,130 @@ class RedisClient:
             logger.error(f"Redis EXISTS error: {str(e)}")
             return False
 
-redis_client = RedisClient()
\ No newline at end of file
+    def publish(self, channel: str, message: str) -> bool:
+        try:
+            self.client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.error(f"Redis PUBLISH error: {str(e)}")
+            return False
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        self._handlers[channel] = handler
+        if self._pubsub_thread is not None:
+            self._pubsub.subscribe(**{channel: self._dispatch(handler)})
+
+    def on_reconnect(self, handler: Callable[[], None]):
+        self._reconnect_handlers.append(handler)
+
+    def start_listener(self):
+        with self._listener_lock:
+            if self._pubsub_thread is not None or not self._handlers:
+                return
+            try:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(**{channel: self._dispatch(handler) for channel, handler in self._handlers.items()})
+                self._pubsub.connection.register_connect_callback(self._listener_reconnected)
+                self._pubsub_thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True,
+                                                                 exception_handler=self._listener_error)
+                logger.info(f"Redis pub/sub listener started for: {', '.join(self._handlers)}")
+            except Exception as e:
+                logger.error(f"Failed to start Redis pub/sub listener: {str(e)}")
+
+    def stop_listener(self):
+        with self._listener_lock:
+            if self._pubsub_thread is None:
+                return
+            self._pubsub_thread.stop()
+            self._pubsub.close()
+            self._pubsub_thread = None
+            self._pubsub = None
+
+    def _dispatch(self, handler: Callable[[str], None]):
+        def on_message(message: Dict):
+            try:
+                handler(message["data"])
+            except Exception as e:
+                logger.error(f"Redis pub/sub handler error: {str(e)}")
+        return on_message
+
+    def _listener_reconnected(self, connection):
+        logger.info("Redis pub/sub listener reconnected")
+        for handler in self._reconnect_handlers:
+            threading.Thread(target=handler, daemon=True).start()
+
+    def _listener_error(self, e, pubsub, thread):
+        logger.error(f"Redis pub/sub listener error: {str(e)}")
+        time.sleep(1.0)
+
+class AsyncRedisClient:
+    def __init__(self):
+        self._clients: Dict[int, aioredis.Redis] = {}
+
+    @property
+    def client(self) -> aioredis.Redis:
+        loop_id = id(asyncio.get_running_loop())
+        client = self._clients.get(loop_id)
+        if client is None:
+            client = aioredis.Redis(host=settings.REDIS_HOST,port=settings.REDIS_PORT,db=0,decode_responses=True,
+                                    socket_connect_timeout=5,socket_timeout=5,max_connections=50,retry_on_timeout=True,)
+            self._clients[loop_id] = client
+        return client
+
+    async def set_with_expiry(self, key: str, value: str, expiry_seconds: int) -> bool:
+        try:
+            await self.client.set(key, value, ex=expiry_seconds)
+            return True
+        except Exception as e:
+            logger.error(f"Redis SET error: {str(e)}")
+            return False
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.get(key)
+        except Exception as e:
+            logger.error(f"Redis GET error: {str(e)}")
+            return None
+
+    async def getdel(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.getdel(key)
+        except Exception as e:
+            logger.error(f"Redis GETDEL error: {str(e)}")
+            return None
+
+    async def delete(self, *keys: str) -> bool:
+        try:
+            await self.client.delete(*keys)
+            return True
+        except Exception as e:
+            logger.error(f"Redis DELETE error: {str(e)}")
+            return False
+
+    async def exists(self, key: str) -> bool:
+        try:
+            return await self.client.exists(key) > 0
+        except Exception as e:
+            logger.error(f"Redis EXISTS error: {str(e)}")
+            return False
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        try:
+            return await self.client.mget(keys)
+        except Exception as e:
+            logger.error(f"Redis MGET error: {str(e)}")
+            return [None] * len(keys)
+
+    def pipeline(self, transaction: bool = False):
+        return self.client.pipeline(transaction=transaction)
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Redis close error: {str(e)}")
+
+redis_client = RedisClient()
+async_redis_client = AsyncRedisClient()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import itertools
+import threading
+from functools import lru_cache
+from typing import List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from app import config
+from app.utils.metricsUtil import registry
+from app.utils.poolUtil import engine_options, instrument
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+LAG_QUERY = text("SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                 "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END")
+
+replica_lag = registry.gauge("db_replica_lag_seconds", "Replication lag reported by each read replica", ["replica"])
+replica_healthy = registry.gauge("db_replica_healthy", "1 when the replica passed its last health check", ["replica"])
+read_sessions = registry.counter("db_read_sessions_total", "Read-only sessions by the database they were routed to", ["target"])
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        parsed = make_url(url)
+        sync_url = parsed.set(drivername=settings.DB_CONNECTION).render_as_string(hide_password=False)
+        async_url = parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+        self.engine = instrument(create_engine(sync_url, **engine_options(sync_url, label=name)))
+        self.async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True, label=f"{name}_async"))
+        instrument(self.async_engine.sync_engine)
+        self.healthy = False
+        self.lag = float("inf")
+        for engine in (self.engine, self.async_engine.sync_engine):
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect and self.healthy:
+            logger.warning(f"Read replica {self.name} disconnected, failing reads over until the next health check")
+            self.mark(False)
+
+    def mark(self, healthy: bool, lag: float = float("inf")):
+        self.healthy = healthy
+        self.lag = lag if healthy else float("inf")
+        replica_healthy.set(1 if healthy else 0, replica=self.name)
+        replica_lag.set(lag if healthy else -1, replica=self.name)
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                lag = float(connection.execute(LAG_QUERY).scalar() or 0)
+            self.mark(True, lag)
+        except Exception as e:
+            if self.healthy:
+                logger.error(f"Read replica {self.name} failed its health check: {str(e)}")
+            self.mark(False)
+
+class ReplicaSet:
+    def __init__(self, urls: List[str], max_lag: float, interval: float):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self.max_lag = max_lag
+        self.interval = interval
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def choose(self, max_staleness: Optional[float] = None) -> Optional[Replica]:
+        bound = self.max_lag if max_staleness is None else max_staleness
+        candidates = [replica for replica in self.replicas if replica.healthy and replica.lag <= bound]
+        if not candidates or bound <= 0:
+            read_sessions.inc(target="primary")
+            return None
+        replica = candidates[next(self._next) % len(candidates)]
+        read_sessions.inc(target=replica.name)
+        return replica
+
+    def check(self):
+        for replica in self.replicas:
+            replica.check()
+
+    def _run(self):
+        self.check()
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    async def dispose(self):
+        self.stop()
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+replica_set = ReplicaSet([url.strip() for url in settings.DB_REPLICA_URLS.split(",") if url.strip()],
+                         settings.DB_REPLICA_MAX_LAG_SECONDS, settings.DB_REPLICA_HEALTH_INTERVAL_SECONDS)
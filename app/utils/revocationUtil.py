@@ -0,0 +1,133 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+from app import config
+from app.utils.redisUtils import redis_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+KEY_PREFIX = "revoked:jti:"
+CHANNEL = "revoked:jti"
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: str):
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: str):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+class RevocationStore:
+    def __init__(self):
+        self.capacity = settings.REVOCATION_BLOOM_CAPACITY
+        self.error_rate = settings.REVOCATION_BLOOM_ERROR_RATE
+        self.rebuild_interval = settings.REVOCATION_BLOOM_REBUILD_SECONDS
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._pending = None
+        self._ready = False
+        self._next_rebuild = 0.0
+        self._rebuilding = threading.Lock()
+
+    @staticmethod
+    def digest(jti: str) -> str:
+        return hashlib.sha256(jti.encode()).hexdigest()
+
+    def start(self):
+        redis_client.subscribe(CHANNEL, self._on_revoked)
+        redis_client.on_reconnect(self.rebuild)
+
+    def rebuild(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return False
+        try:
+            return self._rebuild()
+        finally:
+            self._rebuilding.release()
+
+    def _rebuild(self):
+        self._next_rebuild = time.monotonic() + self.rebuild_interval
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        try:
+            with self._lock:
+                self._pending = bloom
+            cursor = None
+            while cursor != 0:
+                cursor, keys = redis_client.client.scan(cursor or 0, match=f"{KEY_PREFIX}*", count=1000)
+                with self._lock:
+                    for key in keys:
+                        bloom.add(key[len(KEY_PREFIX):])
+        except Exception as e:
+            logger.error(f"Failed to rebuild revocation filter: {str(e)}")
+            self._next_rebuild = time.monotonic() + 30
+            return False
+        finally:
+            with self._lock:
+                self._pending = None
+        if bloom.count > self.capacity:
+            logger.warning(f"Revocation filter over capacity: {bloom.count} entries for capacity {self.capacity}")
+        with self._lock:
+            self._bloom = bloom
+            self._ready = True
+        logger.info(f"Revocation filter rebuilt with {bloom.count} entries")
+        return True
+
+    def _on_revoked(self, digest: str):
+        with self._lock:
+            self._bloom.add(digest)
+            if self._pending is not None:
+                self._pending.add(digest)
+
+    def revoke(self, jti: str, expires_at: int) -> bool:
+        digest = self.digest(jti)
+        ttl = int(expires_at - datetime.now(timezone.utc).timestamp())
+        if ttl <= 0:
+            return True
+        self._on_revoked(digest)
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.setex(f"{KEY_PREFIX}{digest}", ttl, 1)
+            pipe.publish(CHANNEL, digest)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to revoke token in Redis: {str(e)}")
+            return False
+
+    def is_revoked(self, jti: str) -> Optional[bool]:
+        if time.monotonic() > self._next_rebuild:
+            self._next_rebuild = time.monotonic() + self.rebuild_interval
+            threading.Thread(target=self.rebuild, daemon=True).start()
+        digest = self.digest(jti)
+        if self._ready and digest not in self._bloom:
+            return False
+        try:
+            return redis_client.client.exists(f"{KEY_PREFIX}{digest}") > 0
+        except Exception as e:
+            logger.error(f"Failed to check token revocation in Redis: {str(e)}")
+            return None
+
+revocation_store = RevocationStore()
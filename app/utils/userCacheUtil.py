@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from app import config
+from app.utils.redisUtils import redis_client
+from app.utils.metricsUtil import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+KEY_PREFIX = "user:cache:"
+CHANNEL = "user:cache:invalidate"
+TOMBSTONE_TTL = 10
+
+STORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+cache_requests = registry.counter("user_cache_requests_total", "Authenticated-user cache lookups by tier", ["result"])
+cache_saved = registry.counter("user_cache_saved_seconds_total", "Estimated database time saved by authenticated-user cache hits")
+db_fetch_time = registry.histogram("user_cache_db_fetch_seconds", "Database fetch time on authenticated-user cache misses")
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    email: str
+    username: str
+    is_active: bool
+    has_password: bool
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        return cls(id=user.id, email=user.email, username=user.username, is_active=bool(user.is_active),
+                   has_password=user.password is not None)
+
+    def to_hash(self) -> dict:
+        return {"id": self.id, "email": self.email, "username": self.username,
+                "is_active": int(self.is_active), "has_password": int(self.has_password)}
+
+    @classmethod
+    def from_hash(cls, data: dict) -> "CachedUser":
+        return cls(id=int(data["id"]), email=data["email"], username=data["username"],
+                   is_active=data["is_active"] == "1", has_password=data["has_password"] == "1")
+
+class UserCache:
+    def __init__(self):
+        self.maxsize = settings.USER_CACHE_L1_SIZE
+        self.l1_ttl = settings.USER_CACHE_L1_TTL_SECONDS
+        self.l2_ttl = settings.USER_CACHE_L2_TTL_SECONDS
+        self._local: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_cost = 0.0
+        self._store = redis_client.client.register_script(STORE_SCRIPT)
+
+    def start(self):
+        redis_client.subscribe(CHANNEL, self._drop_local)
+
+    def _drop_local(self, user_id):
+        with self._lock:
+            self._local.pop(int(user_id), None)
+
+    def _set_local(self, user: CachedUser):
+        with self._lock:
+            self._local[user.id] = (time.monotonic() + self.l1_ttl, user)
+            self._local.move_to_end(user.id)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        started = time.perf_counter()
+        with self._lock:
+            entry = self._local.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            cache_requests.inc(result="l1_hit")
+            cache_saved.inc(max(0.0, self._db_cost - (time.perf_counter() - started)))
+            return entry[1]
+        try:
+            data = redis_client.client.hgetall(f"{KEY_PREFIX}{user_id}")
+        except Exception as e:
+            logger.error(f"Redis user cache read error: {str(e)}")
+            data = None
+        if data and "invalid" not in data:
+            user = CachedUser.from_hash(data)
+            self._set_local(user)
+            cache_requests.inc(result="l2_hit")
+            cache_saved.inc(max(0.0, self._db_cost - (time.perf_counter() - started)))
+            return user
+        cache_requests.inc(result="miss")
+        return None
+
+    def record_fetch(self, elapsed: float):
+        db_fetch_time.observe(elapsed)
+        self._db_cost = elapsed if not self._db_cost else 0.9 * self._db_cost + 0.1 * elapsed
+
+    def set(self, user) -> CachedUser:
+        cached = CachedUser.from_user(user)
+        self._set_local(cached)
+        fields = [item for pair in cached.to_hash().items() for item in pair]
+        try:
+            self._store(keys=[f"{KEY_PREFIX}{cached.id}"], args=[self.l2_ttl, *fields])
+        except Exception as e:
+            logger.error(f"Redis user cache write error: {str(e)}")
+        return cached
+
+    def invalidate(self, user_id: int):
+        self._drop_local(user_id)
+        try:
+            key = f"{KEY_PREFIX}{user_id}"
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.delete(key)
+            pipe.hset(key, "invalid", 1)
+            pipe.expire(key, TOMBSTONE_TTL)
+            pipe.publish(CHANNEL, user_id)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis user cache invalidation error: {str(e)}")
+
+user_cache = UserCache()
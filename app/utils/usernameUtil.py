@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import config
+from app.auth.models import User
+from app.utils.redisUtils import redis_client, async_redis_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+MAX_LENGTH = 50
+MAX_SUFFIX_DIGITS = 6
+RESERVATION_PREFIX = "username:reserved:"
+
+class UsernameAllocator:
+    def __init__(self, reservation_seconds: int):
+        self.reservation_seconds = reservation_seconds
+
+    def reserve(self, username: str, owner: str = "") -> bool:
+        key = RESERVATION_PREFIX + username.lower()
+        try:
+            if redis_client.client.set(key, owner or "-", nx=True, ex=self.reservation_seconds):
+                return True
+            return bool(owner) and redis_client.get(key) == owner
+        except Exception as e:
+            logger.error(f"Username reservation unavailable, relying on the unique index: {str(e)}")
+            return True
+
+    async def reserve_async(self, username: str, owner: str = "") -> bool:
+        key = RESERVATION_PREFIX + username.lower()
+        try:
+            if await async_redis_client.client.set(key, owner or "-", nx=True, ex=self.reservation_seconds):
+                return True
+            return bool(owner) and await async_redis_client.get(key) == owner
+        except Exception as e:
+            logger.error(f"Username reservation unavailable, relying on the unique index: {str(e)}")
+            return True
+
+    def release(self, username: str):
+        redis_client.delete(RESERVATION_PREFIX + username.lower())
+
+    async def release_async(self, username: str):
+        await async_redis_client.delete(RESERVATION_PREFIX + username.lower())
+
+    @staticmethod
+    def _candidates(base: str):
+        prefix = re.sub(r"([/%_])", r"/\1", base) + "%"
+        return select(User.username).filter(User.username.like(prefix, escape="/"),
+                                            User.username.regexp_match(f"^{re.escape(base)}[0-9]*$"))
+
+    @staticmethod
+    def _suffixes(base: str, usernames) -> set:
+        taken = set()
+        for username in usernames:
+            suffix = username[len(base):]
+            if suffix == "":
+                taken.add(0)
+            elif suffix[0] != "0":
+                taken.add(int(suffix))
+        return taken
+
+    def taken_suffixes(self, db: Session, base: str) -> set:
+        return self._suffixes(base, db.scalars(self._candidates(base)))
+
+    async def taken_suffixes_async(self, db: AsyncSession, base: str) -> set:
+        return self._suffixes(base, await db.scalars(self._candidates(base)))
+
+    @staticmethod
+    def _base(base: str) -> str:
+        return base[:MAX_LENGTH - MAX_SUFFIX_DIGITS] or "user"
+
+    @staticmethod
+    def _next(base: str, taken: set) -> tuple:
+        suffix = 0
+        while suffix in taken:
+            suffix += 1
+        return suffix, base if suffix == 0 else f"{base}{suffix}"
+
+    def allocate(self, db: Session, base: str, owner: str = "") -> str:
+        base = self._base(base)
+        taken = self.taken_suffixes(db, base)
+        while True:
+            suffix, username = self._next(base, taken)
+            if self.reserve(username, owner):
+                return username
+            taken.add(suffix)
+
+    async def allocate_async(self, db: AsyncSession, base: str, owner: str = "") -> str:
+        base = self._base(base)
+        taken = await self.taken_suffixes_async(db, base)
+        while True:
+            suffix, username = self._next(base, taken)
+            if await self.reserve_async(username, owner):
+                return username
+            taken.add(suffix)
+
+    def claim(self, db: Session, username: str, owner: str = "") -> bool:
+        if db.query(User.id).filter(or_(User.username == username, User.email == username)).first():
+            return False
+        return self.reserve(username, owner)
+
+username_allocator = UsernameAllocator(settings.USERNAME_RESERVATION_SECONDS)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from functools import lru_cache
+from typing import Iterable, Optional
+from fastapi import HTTPException, status
+from app import config
+from app.utils.redisUtils import redis_client, async_redis_client
+from app.utils.metricsUtil import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def get_settings():
+    return config.Settings()
+
+settings = get_settings()
+
+KEY_PREFIX = "ws:ver:"
+ROLES = {"a": "admin", "m": "member"}
+
+claim_checks = registry.counter("workspace_claim_checks_total", "Workspace access checks answered from token claims", ["result"])
+
+class WorkspaceClaims:
+    def __init__(self):
+        self.max_workspaces = settings.JWT_WORKSPACE_CLAIMS_MAX
+        self.version_ttl = int((timedelta(days=settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS) + timedelta(days=1)).total_seconds())
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workspaces > 0
+
+    def version(self, user_id: int) -> Optional[int]:
+        try:
+            return int(redis_client.client.get(f"{KEY_PREFIX}{user_id}") or 0)
+        except Exception as e:
+            logger.error(f"Failed to read membership version from Redis: {str(e)}")
+            return None
+
+    def mint_version(self, user_id: int) -> Optional[int]:
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.get(f"{KEY_PREFIX}{user_id}")
+            pipe.expire(f"{KEY_PREFIX}{user_id}", self.version_ttl)
+            return int(pipe.execute()[0] or 0)
+        except Exception as e:
+            logger.error(f"Failed to read membership version from Redis: {str(e)}")
+            return None
+
+    async def mint_version_async(self, user_id: int) -> Optional[int]:
+        try:
+            pipe = async_redis_client.client.pipeline(transaction=False)
+            pipe.get(f"{KEY_PREFIX}{user_id}")
+            pipe.expire(f"{KEY_PREFIX}{user_id}", self.version_ttl)
+            return int((await pipe.execute())[0] or 0)
+        except Exception as e:
+            logger.error(f"Failed to read membership version from Redis: {str(e)}")
+            return None
+
+    def encode(self, version: int, rows: Iterable) -> dict:
+        rows = list(rows)
+        if len(rows) > self.max_workspaces:
+            return {}
+        return {"ws": {str(row.workspace_id): "a" if row.is_admin else "m" for row in rows}, "wsv": version}
+
+    def bump(self, user_ids: Iterable[int], strict: bool = True):
+        user_ids = list(user_ids)
+        if not self.enabled or not user_ids:
+            return
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(f"{KEY_PREFIX}{user_id}")
+                pipe.expire(f"{KEY_PREFIX}{user_id}", self.version_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to bump membership version in Redis: {str(e)}")
+            if strict:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    detail="Membership change could not be applied, try again") from e
+
+    def role(self, payload: dict, workspace_id: int) -> Optional[str]:
+        workspaces = payload.get("ws")
+        if not self.enabled or workspaces is None or payload.get("user_id") is None:
+            claim_checks.inc(result="absent")
+            return None
+        role = ROLES.get(workspaces.get(str(workspace_id)))
+        if role is None:
+            claim_checks.inc(result="absent")
+            return None
+        if self.version(payload["user_id"]) != payload.get("wsv"):
+            claim_checks.inc(result="stale")
+            return None
+        claim_checks.inc(result="hit")
+        return role
+
+workspace_claims = WorkspaceClaims()
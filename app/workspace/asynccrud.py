@@ -0,0 +1,15 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.workspace.model import Workspace,WorkspaceMember
+from app.utils.workspaceClaimsUtil import workspace_claims as claims
+
+async def get_membership_roles(db:AsyncSession,user_id:int,limit:int):
+    result=await db.execute(select(WorkspaceMember.workspace_id,(Workspace.admin_id==user_id).label("is_admin")).join(Workspace)
+                            .filter(WorkspaceMember.user_id==user_id).limit(limit))
+    return result.all()
+
+async def workspace_claims(db:AsyncSession,user_id:int)->dict:
+    version=await claims.mint_version_async(user_id) if claims.enabled else None
+    if version is None:
+        return {}
+    return claims.encode(version,await get_membership_roles(db,user_id,claims.max_workspaces+1))
@@ -1,16 +1,32 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session,selectinload,joinedload
 from app.workspace.model import Workspace,WorkspaceMember
 from app.auth.models import User
 from typing import Optional,List
 from fastapi import HTTPException,status
-from sqlalchemy import func
+from sqlalchemy import func,text
+from sqlalchemy.dialects.postgresql import insert
 from app.workspace import schemas
+from app.utils.paginationUtil import keyset_page
+from app.utils.workspaceClaimsUtil import workspace_claims as claims
+from app.utils.cacheUtil import query_cache
 
-def get_workspace_id(db:Session,id:str):
+WORKSPACE_ORDER=(Workspace.created_at,Workspace.id)
+MEMBER_ORDER=(WorkspaceMember.joined_at,WorkspaceMember.id)
+
+def _workspace_by_id(db:Session,id:int):
     return db.query(Workspace).filter(Workspace.id==id).first()
 
+@query_cache.cached("get_workspace_id",tags=lambda id:[f"ws:{id}"],returns=Optional[schemas.WorkspaceResponse])
+def get_workspace_id(db:Session,id:str):
+    return _workspace_by_id(db,id)
+
+@query_cache.cached("get_workspace_code",tags=lambda code:[f"code:{code}"],returns=Optional[int])
+def _workspace_id_by_code(db:Session,code:str):
+    return db.query(Workspace.id).filter(Workspace.code==code).scalar()
+
 def get_workspace_code(db:Session,code:str):
-    return db.query(Workspace).filter(Workspace.code==code).first()
+    id=_workspace_id_by_code(db,code)
+    return get_workspace_id(db,id) if id is not None else None
 
 def create_workspace(db:Session,data:schemas.WorkspaceCreate,id:int):
     exist=get_workspace_code(db,data.code)
@@ -18,37 +34,104 @@ def create_workspace(db:Session,data:schemas.WorkspaceCreate,id:int):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Use different code")
     db_workspace=Workspace(name=data.name,description=data.description,code=data.code,admin_id=id)
     db.add(db_workspace)
-    db.commit()
+    db.flush()
+    db.add(WorkspaceMember(workspace_id=db_workspace.id,user_id=id,role="admin"))
+    _commit_membership(db,db_workspace.id,[id],tags=[f"code:{db_workspace.code}"])
     db.refresh(db_workspace)
     return db_workspace
 
-def get_user_workspace(db:Session,id:int,search:Optional[str]=None):
-    query=(db.query(Workspace).join(WorkspaceMember).filter(WorkspaceMember.user_id==id))
+def get_workspace_detail(db:Session,name:str):
+    return (db.query(Workspace).filter(Workspace.name==name)
+            .options(joinedload(Workspace.admin),selectinload(Workspace.workspace_members).selectinload(WorkspaceMember.user)).first())
+
+def _name_match(search:str,mode:str):
+    name=func.lower(Workspace.name)
+    search=search.lower()
+    if mode=="prefix":
+        return name.startswith(search,autoescape=True)
+    if mode=="fuzzy":
+        return (name.contains(search,autoescape=True) | name.op("%")(search)
+                | func.lower(Workspace.description).contains(search,autoescape=True))
+    return name==search
+
+def _ranked(query,search:Optional[str],mode:str):
+    if not search or mode!="fuzzy":
+        return query
+    return query.order_by(func.similarity(func.lower(Workspace.name),search.lower()).desc(),
+                          Workspace.created_at.desc(),Workspace.id.desc())
+
+def _ranked_page(query,search:Optional[str],mode:str,cursor:Optional[str],limit:int):
+    if search and mode=="fuzzy":
+        if cursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Fuzzy search results are ranked and cannot be paged")
+        return _ranked(query,search,mode).limit(limit).all(),None
+    return keyset_page(query,WORKSPACE_ORDER,cursor,limit,descending=True)
+
+def _user_workspace_query(db:Session,id:int,search:Optional[str]=None,mode:str="exact"):
+    query=db.query(Workspace).join(WorkspaceMember).filter(WorkspaceMember.user_id==id)
     if search:
         try:
             workspace_id=int(search)
-            query=query.filter((Workspace.id==workspace_id) | (func.lower(Workspace.name) == search.lower()))
+            query=query.filter((Workspace.id==workspace_id) | _name_match(search,mode))
         except ValueError:
-            query=query.filter(func.lower(Workspace.name) == search.lower())
-    return query.all()
+            query=query.filter(_name_match(search,mode))
+    return query
+
+@query_cache.cached("get_user_workspace",tags=lambda id,search,mode:[f"user:{id}"],returns=List[schemas.WorkspaceResponse])
+def get_user_workspace(db:Session,id:int,search:Optional[str]=None,mode:str="exact"):
+    return _ranked(_user_workspace_query(db,id,search,mode),search,mode).all()
 
-def search_workspace(db:Session,id:int,name:Optional[str]=None):
+def get_user_workspace_page(db:Session,id:int,search:Optional[str],cursor:Optional[str],limit:int,mode:str="exact"):
+    return _ranked_page(_user_workspace_query(db,id,search,mode),search,mode,cursor,limit)
+
+def _search_workspace_query(db:Session,id:int,name:Optional[str]=None,mode:str="exact"):
     query=db.query(Workspace).join(WorkspaceMember).filter(WorkspaceMember.user_id==id)
     if name:
-        query=query.filter(func.lower(Workspace.name) == func.lower(name))
-    return query.all()
+        query=query.filter(_name_match(name,mode))
+    return query
+
+def search_workspace(db:Session,id:int,name:Optional[str]=None,mode:str="exact"):
+    return _ranked(_search_workspace_query(db,id,name,mode),name,mode).all()
+
+def search_workspace_page(db:Session,id:int,name:Optional[str],cursor:Optional[str],limit:int,mode:str="exact"):
+    return _ranked_page(_search_workspace_query(db,id,name,mode),name,mode,cursor,limit)
 
 def update_workspace(db:Session,id:int,data:schemas.WorkspaceUpdate):
-    workspace=get_workspace_id(db,id)
+    workspace=_workspace_by_id(db,id)
     if not workspace:
         return HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="workspace not found")
     update=data.model_dump(exclude_unset=True)
     for field ,value in update.items():
         setattr(workspace,field,value)
+    tags=[f"ws:{id}",*[f"user:{user_id}" for user_id in _member_user_ids(db,id)]]
+    query_cache.invalidate(tags,strict=True)
     db.commit()
+    query_cache.invalidate(tags)
     db.refresh(workspace)
     return workspace
 
+def _member_user_ids(db:Session,workspace_id:int)->list:
+    return [row.user_id for row in db.query(WorkspaceMember.user_id).filter(WorkspaceMember.workspace_id==workspace_id)]
+
+def _commit_membership(db:Session,workspace_id:int,user_ids,tags=()):
+    members={*user_ids,*_member_user_ids(db,workspace_id)}
+    tags=[f"ws:{workspace_id}",*tags,*[f"user:{user_id}" for user_id in members]]
+    claims.bump(user_ids)
+    query_cache.invalidate(tags,strict=True)
+    db.commit()
+    claims.bump(user_ids,strict=False)
+    query_cache.invalidate(tags)
+
+def get_membership_roles(db:Session,user_id:int,limit:int):
+    return (db.query(WorkspaceMember.workspace_id,(Workspace.admin_id==user_id).label("is_admin")).join(Workspace)
+            .filter(WorkspaceMember.user_id==user_id).limit(limit).all())
+
+def workspace_claims(db:Session,user_id:int)->dict:
+    version=claims.mint_version(user_id) if claims.enabled else None
+    if version is None:
+        return {}
+    return claims.encode(version,get_membership_roles(db,user_id,claims.max_workspaces+1))
+
 def add_member(db:Session,workspace:Workspace,user:User,role:str="member"):
     exist=db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id==workspace.id,
                                            WorkspaceMember.user_id==user.id).first()
@@ -56,16 +139,34 @@ def add_member(db:Session,workspace:Workspace,user:User,role:str="member"):
         return exist
     member=WorkspaceMember(workspace_id=workspace.id,user_id=user.id,role=role)
     db.add(member)
-    db.commit()
+    _commit_membership(db,workspace.id,[user.id])
     db.refresh(member)
     return member
 
+def get_member_ids(db:Session,workspace_id:int,user_ids:list)->set:
+    if not user_ids:
+        return set()
+    rows=db.query(WorkspaceMember.user_id).filter(WorkspaceMember.workspace_id==workspace_id,
+                                                 WorkspaceMember.user_id.in_(user_ids)).all()
+    return {row.user_id for row in rows}
+
+def add_members(db:Session,workspace_id:int,user_ids:list,role:str="member",notify=None)->set:
+    if not user_ids:
+        return set()
+    stmt=(insert(WorkspaceMember).values([{"workspace_id":workspace_id,"user_id":user_id,"role":role} for user_id in user_ids])
+          .on_conflict_do_nothing(index_elements=["workspace_id","user_id"]).returning(WorkspaceMember.user_id))
+    added={row.user_id for row in db.execute(stmt)}
+    if notify and added:
+        notify(added)
+    _commit_membership(db,workspace_id,added)
+    return added
+
 def remove_member(db:Session,workspace:Workspace,user:User):
     member=db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id==workspace.id,
                                            WorkspaceMember.user_id==user.id).first()
     if member:
         db.delete(member)
-        db.commit()
+        _commit_membership(db,workspace.id,[user.id])
 
 def is_member(db:Session,workspace:Workspace,user:User):
     member=db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id==workspace.id,
@@ -76,18 +177,44 @@ def is_admin(workspace:Workspace,id:int)->bool:
     return workspace.admin_id==id
 
 def get_member(db:Session,workspace:Workspace)->List[User]:
-    member=db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == workspace.id).all()
+    member=(db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id == workspace.id)
+            .options(joinedload(WorkspaceMember.user)).all())
     return [m.user for m in member]
 
+def _member_detail(m:WorkspaceMember)->dict:
+    return {"id": m.user.id,"email": m.user.email,"username": getattr(m.user, "username", None),
+            "joined_at": m.joined_at,"role": m.role,}
+
+def _member_query(db:Session,id:int):
+    return (db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id==id)
+            .options(joinedload(WorkspaceMember.user)))
+
+@query_cache.cached("get_member_details",tags=lambda id:[f"ws:{id}"],returns=List[schemas.MemberDetail])
 def get_member_details(db:Session,id:int)->List[dict]:
-    member=db.query(WorkspaceMember).filter(WorkspaceMember.workspace_id==id).all()
-    return [{"id": m.user.id,"email": m.user.email,"username": getattr(m.user, "username", None),
-             "joined_at": m.joined_at,"role": m.role,}for m in member]
+    return [_member_detail(m) for m in _member_query(db,id).all()]
+
+def get_member_details_page(db:Session,id:int,cursor:Optional[str],limit:int)->tuple:
+    members,next_cursor=keyset_page(_member_query(db,id),MEMBER_ORDER,cursor,limit)
+    return [_member_detail(m) for m in members],next_cursor
 
 def delete_workspace(db:Session,id:int):
-    workspace=get_workspace_id(db,id)
+    workspace=_workspace_by_id(db,id)
     if workspace:
+        user_ids=_member_user_ids(db,id)
         db.delete(workspace)
-        db.commit()
+        _commit_membership(db,id,user_ids,tags=[f"code:{workspace.code}"])
         return True
-    return False
\ No newline at end of file
+    return False
+
+def reconcile_member_counts(db:Session,after_id:int,batch_size:int=1000)->tuple:
+    ids=[row.id for row in db.query(Workspace.id).filter(Workspace.id>after_id).order_by(Workspace.id)
+         .limit(batch_size).with_for_update().all()]
+    if not ids:
+        db.commit()
+        return (after_id,0,0)
+    repaired=db.execute(text("UPDATE workspaces w SET member_count = m.n FROM (SELECT w2.id, "
+                             "(SELECT count(*) FROM workspace_members wm WHERE wm.workspace_id = w2.id) AS n "
+                             "FROM workspaces w2 WHERE w2.id = ANY(:ids)) m "
+                             "WHERE w.id = m.id AND w.member_count <> m.n"),{"ids":ids}).rowcount
+    db.commit()
+    return (ids[-1],len(ids),repaired)
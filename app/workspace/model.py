@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Integer,Text,String,DateTime,ForeignKey,Boolean
+from sqlalchemy import Column,Integer,Text,String,DateTime,ForeignKey,Boolean,UniqueConstraint,Index,func
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from app.utils.dbUtil import Base
@@ -15,23 +15,28 @@ class Workspace(Base):
     updated_at=Column(DateTime(timezone=True),default=lambda:datetime.now(timezone.utc),
                       onupdate=lambda:datetime.now(timezone.utc))
     is_active=Column(Boolean,default=True)
+    member_count=Column(Integer,nullable=False,default=0,server_default="0")
     admin=relationship("User",foreign_keys=[admin_id],back_populates="owned_workspaces")
     workspace_members=relationship("WorkspaceMember",back_populates="workspace",cascade="all, delete-orphan")
+    __table_args__=(Index('ix_workspaces_name_lower',func.lower(name)),
+                    Index('ix_workspaces_name_trgm',func.lower(name).label('name_trgm'),postgresql_using='gin',
+                          postgresql_ops={'name_trgm':'gin_trgm_ops'}),
+                    Index('ix_workspaces_description_trgm',func.lower(description).label('description_trgm'),
+                          postgresql_using='gin',postgresql_ops={'description_trgm':'gin_trgm_ops'}),)
     
     @property
     def members(self):
         return [member.user for member in self.workspace_members]
     
-    @property
-    def member_count(self):
-        return len(self.workspace_members)
-    
 class WorkspaceMember(Base):
     __tablename__="workspace_members"
     id=Column(Integer,primary_key=True,index=True)
     workspace_id=Column(Integer,ForeignKey('workspaces.id',ondelete='CASCADE'),nullable=False)
     user_id=Column(Integer,ForeignKey('users.id',ondelete='CASCADE'),nullable=False)
-    joined_at=Column(DateTime,default=datetime.now(timezone.utc),nullable=False)
+    joined_at=Column(DateTime,default=lambda:datetime.now(timezone.utc),nullable=False)
     role=Column(String(50),default="member")
     workspace=relationship("Workspace",back_populates="workspace_members")
-    user=relationship("User",back_populates="workspace_members")
\ No newline at end of file
+    user=relationship("User",back_populates="workspace_members")
+    __table_args__=(UniqueConstraint('workspace_id','user_id',name='uq_workspace_member'),
+                    Index('ix_workspace_members_user_id','user_id'),
+                    Index('ix_workspace_members_workspace_joined','workspace_id','joined_at','id'),)
\ No newline at end of file
@@ -1,16 +1,17 @@
 from fastapi import APIRouter,Depends,HTTPException,status,Query,Request
 from sqlalchemy.orm import Session
-from typing import Optional,List
-from app.utils.dbUtil import get_db
+from typing import Optional,List,Union,Literal
+from app.utils.dbUtil import get_db,get_read_db
 from app.auth.models import User
-from app.auth.crud import get_user_email,get_user_id
+from app.auth.crud import get_user_id,get_user_ids_by_email
 from app.workspace import crud
 from app.workspace import schemas
 from app.utils import JWTUtil
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from app.utils.emailUtil import workspace_invitation
-from app.workspace.model import Workspace
+from app.utils.paginationUtil import page_size
+from app.utils.workspaceClaimsUtil import workspace_claims
 
 router=APIRouter()
 limiter=Limiter(key_func=get_remote_address)
@@ -19,35 +20,40 @@ limiter=Limiter(key_func=get_remote_address)
 @limiter.limit("20/minute")
 def create_workspace(request: Request,data:schemas.WorkspaceCreate,db:Session=Depends(get_db)
                      ,current_user:User=Depends(JWTUtil.get_user)):
-    workspace=crud.create_workspace(db,data,current_user.id)
-    crud.add_member(db,workspace,current_user,role="admin")
-    return workspace
+    return crud.create_workspace(db,data,current_user.id)
 
-@router.get("/api/workspace/my/",response_model=List[schemas.WorkspaceResponse])
+@router.get("/api/workspace/my/",response_model=Union[List[schemas.WorkspaceResponse],schemas.WorkspacePage])
 @limiter.limit("50/minute")
-def get_my_workspaces(request: Request,db:Session=Depends(get_db),current_user:User=Depends(JWTUtil.get_user),
-                      search:Optional[str]=Query(None,description="Search by workspace name")):
-    workspaces=crud.get_user_workspace(db,current_user.id,search)
-    for workspace in workspaces:
-        workspace.member_count=len(workspace.workspace_member)
-    return workspaces
+def get_my_workspaces(request: Request,db:Session=Depends(get_read_db),current_user:User=Depends(JWTUtil.get_user),
+                      search:Optional[str]=Query(None,description="Search by workspace name"),
+                      mode:Literal["exact","prefix","fuzzy"]=Query("exact",description="name matching: exact, prefix or fuzzy (ranked)"),
+                      cursor:Optional[str]=Query(None,description="next_cursor of the previous page"),
+                      limit:Optional[int]=Query(None,ge=1,description="page size, enables paginated responses")):
+    if cursor is None and limit is None:
+        return crud.get_user_workspace(db,current_user.id,search,mode)
+    items,next_cursor=crud.get_user_workspace_page(db,current_user.id,search,cursor,page_size(limit),mode)
+    return {"items": items,"next_cursor": next_cursor}
 
-@router.get("/api/workspace/search/", response_model=List[schemas.WorkspaceResponse])
+@router.get("/api/workspace/search/", response_model=Union[List[schemas.WorkspaceResponse],schemas.WorkspacePage])
 @limiter.limit("100/minute")
-def search_workspaces(request: Request,name:str=Query(None, description="workspace name"),db:Session=Depends(get_db),
-                      current_user:User=Depends(JWTUtil.get_user)):
-    workspaces=crud.search_workspace(db,current_user.id,name)
-    for workspace in workspaces:
-        workspace.member_count=len(workspace.workspace_member)
-    return workspaces
+def search_workspaces(request: Request,name:str=Query(None, description="workspace name"),db:Session=Depends(get_read_db),
+                      current_user:User=Depends(JWTUtil.get_user),
+                      mode:Literal["exact","prefix","fuzzy"]=Query("exact",description="name matching: exact, prefix or fuzzy (ranked)"),
+                      cursor:Optional[str]=Query(None,description="next_cursor of the previous page"),
+                      limit:Optional[int]=Query(None,ge=1,description="page size, enables paginated responses")):
+    if cursor is None and limit is None:
+        return crud.search_workspace(db,current_user.id,name,mode)
+    items,next_cursor=crud.search_workspace_page(db,current_user.id,name,cursor,page_size(limit),mode)
+    return {"items": items,"next_cursor": next_cursor}
 
 @router.get("/api/workspace/detail/{name}/", response_model=schemas.WorkspaceWithMembers)
 @limiter.limit("100/minute")
-def get_workspace(request:Request,name:str,db:Session=Depends(get_db),current_user:User=Depends(JWTUtil.get_user)):
-    workspace = db.query(Workspace).filter(Workspace.name == name).first()
+def get_workspace(request:Request,name:str,db:Session=Depends(get_read_db),current_user:User=Depends(JWTUtil.get_user),
+                  claims:dict=Depends(JWTUtil.token_claims)):
+    workspace=crud.get_workspace_detail(db,name)
     if not workspace:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Workspace not found")
-    if not crud.is_member(db,workspace,current_user):
+    if not workspace_claims.role(claims,workspace.id) and not crud.is_member(db,workspace,current_user):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="You are not a member of this workspace")
     return workspace
 
@@ -71,33 +77,35 @@ def invite_users(request: Request,id:int,data:schemas.WorkspaceInvite,db:Session
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Workspace not found")
     if not crud.is_admin(workspace,current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="Only workspace admin can invite users")
-    invited = []
-    already_members = []
-    not_found = []
-    for email in data.emails:
-        user=get_user_email(db,email)
-        if not user:
-            not_found.append(email)
-            continue
-        if crud.is_member(db,workspace,user):
-            already_members.append(email)
-            continue
-        crud.add_member(db,workspace,user)
-        workspace_invitation(email=email,name=workspace.name,code=workspace.code,admin=getattr(current_user,"username",current_user.email))
-        invited.append(email)
+    emails=list(dict.fromkeys(data.emails))
+    user_ids=get_user_ids_by_email(db,emails)
+    existing=crud.get_member_ids(db,workspace.id,list(user_ids.values()))
+    admin=getattr(current_user,"username",current_user.email)
+    candidates=[user_id for user_id in user_ids.values() if user_id not in existing]
+    invited_ids=crud.add_members(db,workspace.id,candidates,notify=lambda added:workspace_invitation(
+        db,[email for email,user_id in user_ids.items() if user_id in added],workspace.name,workspace.code,admin))
+    invited=[email for email in emails if user_ids.get(email) in invited_ids]
+    already_members=[email for email in emails if email in user_ids and user_ids[email] not in invited_ids]
+    not_found=[email for email in emails if email not in user_ids]
     return {"message": "Invitation process completed","invited": invited,"already_members": already_members,
             "not_found": not_found}
 
-@router.get("/api/workspace/members/{id}",response_model=List[schemas.MemberDetail])
+@router.get("/api/workspace/members/{id}",response_model=Union[List[schemas.MemberDetail],schemas.MemberPage])
 @limiter.limit("10/minute")
-def get_workspace_members(request: Request,id:int,db:Session=Depends(get_db),current_user:User=Depends(JWTUtil.get_user)):
-    workspace=crud.get_workspace_id(db,id)
-    if not workspace:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Workspace not found")
-    if not crud.is_member(db,workspace,current_user):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="You are not a member of this workspace")
-    members=crud.get_member_details(db,id)
-    return members
+def get_workspace_members(request: Request,id:int,db:Session=Depends(get_read_db),current_user:User=Depends(JWTUtil.get_user),
+                          cursor:Optional[str]=Query(None,description="next_cursor of the previous page"),
+                          limit:Optional[int]=Query(None,ge=1,description="page size, enables paginated responses"),
+                          claims:dict=Depends(JWTUtil.token_claims)):
+    if not workspace_claims.role(claims,id):
+        workspace=crud.get_workspace_id(db,id)
+        if not workspace:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Workspace not found")
+        if not crud.is_member(db,workspace,current_user):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="You are not a member of this workspace")
+    if cursor is None and limit is None:
+        return crud.get_member_details(db,id)
+    items,next_cursor=crud.get_member_details_page(db,id,cursor,page_size(limit))
+    return {"items": items,"next_cursor": next_cursor}
 
 @router.delete("/api/workspace/{id}/member/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 @limiter.limit("50/minute")
@@ -126,7 +134,7 @@ def join_workspace(request: Request,id:int,code:str,db:Session=Depends(get_db),c
     if crud.is_member(db,workspace,current_user):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="You are already a member of this workspace")
     crud.add_member(db,workspace,current_user)
-    return workspace
+    return crud.get_workspace_id(db,id)
 
 @router.delete("/api/workspace/delete/{id}/", status_code=status.HTTP_204_NO_CONTENT)
 @limiter.limit("50/minute")
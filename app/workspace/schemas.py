@@ -1,4 +1,4 @@
-from pydantic import BaseModel,EmailStr,Field,field_validator
+from pydantic import BaseModel,EmailStr,Field,field_validator,AliasChoices
 from typing import Optional,List
 from datetime import datetime
 import re
@@ -24,7 +24,7 @@ class WorkspaceUpdate(BaseModel):
     is_active:Optional[bool]=None
 
 class WorkspaceInvite(BaseModel):
-    email:List[EmailStr]=Field(...,min_items=1)
+    emails:List[EmailStr]=Field(...,min_length=1,max_length=1000,validation_alias=AliasChoices("emails","email"))
 
 class UserBasic(BaseModel):
     id:int
@@ -58,6 +58,14 @@ class WorkspaceResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WorkspacePage(BaseModel):
+    items:List[WorkspaceResponse]
+    next_cursor:Optional[str]=None
+
+class MemberPage(BaseModel):
+    items:List[MemberDetail]
+    next_cursor:Optional[str]=None
+
 class WorkspaceWithMembers(WorkspaceResponse):
     admin: UserBasic
     members: List[UserBasic]
\ No newline at end of file
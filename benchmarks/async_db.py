@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import statistics
+import time
+from sqlalchemy import text
+from app.utils.dbUtil import SessionLocal, AsyncSessionLocal, async_engine, engine
+
+QUERY = text("SELECT users.id FROM users JOIN oauth_accounts ON oauth_accounts.user_id = users.id "
+             "WHERE oauth_accounts.provider = :provider AND oauth_accounts.provider_user_id = :provider_user_id "
+             "AND pg_sleep(:latency) IS NOT NULL")
+
+async def sync_lookup(params):
+    db = SessionLocal()
+    try:
+        db.execute(QUERY, params).first()
+    finally:
+        db.close()
+
+async def async_lookup(params):
+    async with AsyncSessionLocal() as db:
+        (await db.execute(QUERY, params)).first()
+
+async def run(label: str, lookup, concurrency: int, requests: int, params: dict):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await lookup(params)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<8} c={concurrency:<4} {requests / elapsed:>10,.0f} req/s  "
+          f"p50 {statistics.median(latencies) * 1e3:>8.1f} ms  p99 {p99 * 1e3:>8.1f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare a sync Session on the event loop with AsyncSession under concurrency")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("-l", "--latency-ms", type=float, default=5, help="server-side delay added to each query")
+    args = parser.parse_args()
+
+    params = {"provider": "github", "provider_user_id": "0", "latency": args.latency_ms / 1000}
+    try:
+        for concurrency in args.concurrency:
+            await run("sync", sync_lookup, concurrency, args.requests, params)
+            await run("async", async_lookup, concurrency, args.requests, params)
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
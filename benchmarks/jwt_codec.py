@@ -0,0 +1,34 @@
+import argparse
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from app.utils.jwtCodecUtil import CODECS, CachingDecoder
+
+def run(label: str, fn, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {iterations / elapsed:>12,.0f} ops/s  {elapsed / iterations * 1e6:>8.1f} us/op")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JWT codec backends for encode and decode throughput")
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    parser.add_argument("-a", "--algorithm", default="HS256")
+    args = parser.parse_args()
+
+    key = secrets.token_urlsafe(48)
+    now = datetime.now(timezone.utc)
+    claims = {"sub": "user@example.com", "user_id": 42, "iat": int(now.timestamp()),
+              "exp": int((now + timedelta(days=1)).timestamp()), "jti": secrets.token_hex(16)}
+
+    for name, codec_class in CODECS.items():
+        codec = codec_class(args.algorithm, key)
+        token = codec.encode(claims)
+        cached = CachingDecoder(codec, 1024)
+        run(f"{name} encode", lambda: codec.encode(claims), args.iterations)
+        run(f"{name} decode", lambda: codec.decode(token), args.iterations)
+        run(f"{name} decode (cached)", lambda: cached.decode(token), args.iterations)
+
+if __name__ == "__main__":
+    main()
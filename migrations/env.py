@@ -0,0 +1,33 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from app.utils.dbUtil import Base, pgsql_url
+import app.auth.models
+import app.workspace.model
+import app.outbox.model
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    context.configure(url=pgsql_url(),target_metadata=target_metadata,literal_binds=True,
+                      dialect_opts={"paramstyle": "named"},transaction_per_migration=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    engine = create_engine(pgsql_url(),poolclass=NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection,target_metadata=target_metadata,transaction_per_migration=True)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
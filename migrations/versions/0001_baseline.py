@@ -0,0 +1,103 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old init_db() already have these tables; the
+upgrade leaves them untouched so they can be brought under Alembic with
+a plain `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table("users"):
+        return
+    op.create_table("Blacklist",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("token", sa.String(500), nullable=False),
+                    sa.Column("blacklisted_at", sa.DateTime(timezone=True)))
+    op.create_index("ix_Blacklist_token", "Blacklist", ["token"], unique=True)
+    op.create_index("ix_Blacklist_blacklisted_at", "Blacklist", ["blacklisted_at"])
+
+    op.create_table("users",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("email", sa.String(100), nullable=False),
+                    sa.Column("password", sa.String(255)),
+                    sa.Column("username", sa.String(50), nullable=False),
+                    sa.Column("created_at", sa.DateTime(timezone=True)),
+                    sa.Column("is_active", sa.Boolean()),
+                    sa.Column("is_verified", sa.Boolean()))
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table("OTPs",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE")),
+                    sa.Column("email", sa.String(100), nullable=False),
+                    sa.Column("otp_code", sa.String(6), nullable=False),
+                    sa.Column("purpose", sa.String(20), nullable=False),
+                    sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+                    sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+                    sa.Column("failed_attempt", sa.Integer()),
+                    sa.Column("max_attempt", sa.Integer()),
+                    sa.Column("locked_until", sa.DateTime(timezone=True)))
+    op.create_index("ix_OTPs_email", "OTPs", ["email"])
+
+    op.create_table("oauth_accounts",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+                    sa.Column("provider", sa.String(50), nullable=False),
+                    sa.Column("provider_user_id", sa.String(255), nullable=False),
+                    sa.Column("created_at", sa.DateTime(timezone=True)),
+                    sa.Column("updated_at", sa.DateTime(timezone=True)),
+                    sa.UniqueConstraint("user_id", "provider", name="uq_user_provider"))
+
+    op.create_table("profiles",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+                    sa.Column("name", sa.String(100), nullable=False),
+                    sa.Column("post", sa.String(100), nullable=False),
+                    sa.Column("reason", sa.Text()),
+                    sa.Column("image_url", sa.String(500)),
+                    sa.Column("created_at", sa.DateTime(timezone=True)),
+                    sa.Column("updated_at", sa.DateTime(timezone=True)))
+    op.create_index("ix_profiles_user_id", "profiles", ["user_id"], unique=True)
+
+    op.create_table("workspaces",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("name", sa.String(), nullable=False),
+                    sa.Column("description", sa.Text()),
+                    sa.Column("code", sa.String(8), nullable=False),
+                    sa.Column("admin_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+                    sa.Column("created_at", sa.DateTime(timezone=True)),
+                    sa.Column("updated_at", sa.DateTime(timezone=True)),
+                    sa.Column("is_active", sa.Boolean()))
+    op.create_index("ix_workspaces_id", "workspaces", ["id"])
+    op.create_index("ix_workspaces_code", "workspaces", ["code"], unique=True)
+
+    op.create_table("workspace_members",
+                    sa.Column("id", sa.Integer(), primary_key=True),
+                    sa.Column("workspace_id", sa.Integer(), sa.ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False),
+                    sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+                    sa.Column("joined_at", sa.DateTime(), nullable=False),
+                    sa.Column("role", sa.String(50)))
+    op.create_index("ix_workspace_members_id", "workspace_members", ["id"])
+
+
+def downgrade():
+    op.drop_table("workspace_members")
+    op.drop_table("workspaces")
+    op.drop_table("profiles")
+    op.drop_table("oauth_accounts")
+    op.drop_table("OTPs")
+    op.drop_table("users")
+    op.drop_table("Blacklist")
@@ -0,0 +1,38 @@
+"""email outbox table, deduplicated workspace members
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_context().as_sql or not sa.inspect(op.get_bind()).has_table("email_outbox"):
+        op.create_table("email_outbox",
+                        sa.Column("id", sa.Integer(), primary_key=True),
+                        sa.Column("kind", sa.String(50), nullable=False),
+                        sa.Column("recipients", sa.JSON(), nullable=False),
+                        sa.Column("payload", sa.JSON()),
+                        sa.Column("status", sa.String(20), nullable=False),
+                        sa.Column("attempts", sa.Integer(), nullable=False),
+                        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+                        sa.Column("last_error", sa.Text()),
+                        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+                        sa.Column("sent_at", sa.DateTime(timezone=True)))
+        op.create_index("ix_email_outbox_pending", "email_outbox", ["next_attempt_at", "id"],
+                        postgresql_where=sa.text("status = 'pending'"))
+
+    op.execute("DELETE FROM workspace_members a USING workspace_members b "
+               "WHERE a.workspace_id = b.workspace_id AND a.user_id = b.user_id AND a.id > b.id")
+
+
+def downgrade():
+    op.drop_table("email_outbox")
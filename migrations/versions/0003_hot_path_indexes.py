@@ -0,0 +1,47 @@
+"""hot-path indexes, built concurrently
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Every index is built with CREATE INDEX CONCURRENTLY so the tables stay
+writable while it runs. A build interrupted half way leaves an INVALID
+index behind that IF NOT EXISTS would skip; scripts/check_indexes.py
+reports those so they can be dropped and the upgrade re-run.
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('uq_workspace_member', 'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_workspace_member ON workspace_members (workspace_id, user_id)'),
+    ('ix_workspace_members_user_id', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_workspace_members_user_id ON workspace_members (user_id)'),
+    ('"ix_OTPs_email_purpose"', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_OTPs_email_purpose" ON "OTPs" (email, purpose)'),
+    ('"ix_OTPs_expires_at"', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_OTPs_expires_at" ON "OTPs" (expires_at)'),
+    ('ix_oauth_accounts_provider_user', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_oauth_accounts_provider_user ON oauth_accounts (provider, provider_user_id)'),
+    ('ix_workspaces_name_lower', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_workspaces_name_lower ON workspaces (lower(name))'),
+    ('ix_users_unverified_created_at', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_unverified_created_at ON users (created_at) WHERE is_verified = false'),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, ddl in INDEXES:
+            op.execute(ddl)
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS "ix_OTPs_email"')
+    op.execute("DO $$ BEGIN "
+               "IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_workspace_member') THEN "
+               "ALTER TABLE workspace_members ADD CONSTRAINT uq_workspace_member UNIQUE USING INDEX uq_workspace_member; "
+               "END IF; END $$")
+
+
+def downgrade():
+    op.execute("ALTER TABLE workspace_members DROP CONSTRAINT IF EXISTS uq_workspace_member")
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_OTPs_email" ON "OTPs" (email)')
+        for name, ddl in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,53 @@
+"""persisted workspaces.member_count kept by statement-level triggers
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+The triggers read the transition tables of each INSERT/DELETE statement
+on workspace_members, so a bulk invite adjusts each workspace with one
+UPDATE, and cascaded deletes (users, workspaces) are counted too.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("workspaces", sa.Column("member_count", sa.Integer(), nullable=False, server_default="0"))
+    op.execute("""
+        CREATE OR REPLACE FUNCTION workspace_members_count_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE workspaces w SET member_count = w.member_count + d.n
+            FROM (SELECT workspace_id, count(*) AS n FROM inserted GROUP BY workspace_id) d
+            WHERE w.id = d.workspace_id;
+            RETURN NULL;
+        END $$""")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION workspace_members_count_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE workspaces w SET member_count = GREATEST(w.member_count - d.n, 0)
+            FROM (SELECT workspace_id, count(*) AS n FROM deleted GROUP BY workspace_id) d
+            WHERE w.id = d.workspace_id;
+            RETURN NULL;
+        END $$""")
+    op.execute("CREATE TRIGGER workspace_members_count_insert AFTER INSERT ON workspace_members "
+               "REFERENCING NEW TABLE AS inserted FOR EACH STATEMENT EXECUTE FUNCTION workspace_members_count_insert()")
+    op.execute("CREATE TRIGGER workspace_members_count_delete AFTER DELETE ON workspace_members "
+               "REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION workspace_members_count_delete()")
+    op.execute("UPDATE workspaces w SET member_count = m.n "
+               "FROM (SELECT workspace_id, count(*) AS n FROM workspace_members GROUP BY workspace_id) m "
+               "WHERE w.id = m.workspace_id")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS workspace_members_count_delete ON workspace_members")
+    op.execute("DROP TRIGGER IF EXISTS workspace_members_count_insert ON workspace_members")
+    op.execute("DROP FUNCTION IF EXISTS workspace_members_count_delete()")
+    op.execute("DROP FUNCTION IF EXISTS workspace_members_count_insert()")
+    op.drop_column("workspaces", "member_count")
@@ -0,0 +1,37 @@
+"""trigram indexes for prefix and fuzzy workspace search
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+pg_trgm GIN indexes serve LIKE 'q%', LIKE '%q%' and the similarity
+operator (%) on lower(name) / lower(description), which the plain
+lower(name) btree from 0003 cannot.
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_workspaces_name_trgm", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_workspaces_name_trgm "
+                                "ON workspaces USING gin (lower(name) gin_trgm_ops)"),
+    ("ix_workspaces_description_trgm", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_workspaces_description_trgm "
+                                       "ON workspaces USING gin (lower(description) gin_trgm_ops)"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, ddl in INDEXES:
+            op.execute(ddl)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, ddl in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,28 @@
+"""text_pattern_ops index for username prefix scans
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+The username allocator looks up "<base>%" with LIKE. Under a non-C
+collation the unique btree on username cannot serve prefix matches,
+so this adds a text_pattern_ops index that can.
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_pattern "
+                   "ON users (username text_pattern_ops)")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_username_pattern")
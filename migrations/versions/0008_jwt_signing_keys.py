@@ -0,0 +1,30 @@
+"""jwt signing keys table
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+Asymmetric signing keys move from a per-container JWT_KEYS_DIR into the
+database so every instance signs with, and publishes, the same keys.
+Keys already in JWT_KEYS_DIR are imported the first time the app starts.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table("jwt_signing_keys",
+                    sa.Column("not_before", sa.BigInteger(), primary_key=True),
+                    sa.Column("algorithm", sa.String(20), primary_key=True),
+                    sa.Column("private_key", sa.Text(), nullable=False),
+                    sa.Column("created_at", sa.DateTime(timezone=True), nullable=False))
+
+
+def downgrade():
+    op.drop_table("jwt_signing_keys")
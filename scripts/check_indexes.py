@@ -0,0 +1,94 @@
+import argparse
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import func, select, text, tuple_
+from app.utils.dbUtil import SessionLocal, engine
+from app.auth.models import User, OAuthAccount, OTP, TokenBlackList, Profile
+from app.workspace.model import Workspace, WorkspaceMember
+from app.utils.usernameUtil import username_allocator
+from app.outbox.model import EmailOutbox
+
+NOW = datetime.now(timezone.utc)
+
+QUERIES = {
+    "auth.get_user_email": select(User).filter(User.email == "user@example.com"),
+    "auth.get_user_id": select(User).filter(User.id == 1, User.is_active == True),
+    "auth.get_user_and_username": select(User).filter((User.email == "user") | (User.username == "user")),
+    "auth.username_candidates": username_allocator._candidates("octocat"),
+    "auth.get_user_ids_by_email": select(User.id, User.email).filter(User.email.in_(["a@example.com", "b@example.com"])),
+    "auth.token_blacklisted": select(TokenBlackList).filter(TokenBlackList.token == "token"),
+    "auth.get_user_oauth": select(User).join(OAuthAccount, OAuthAccount.user_id == User.id)
+                           .filter(OAuthAccount.provider == "github", OAuthAccount.provider_user_id == "1"),
+    "auth.link_oauth_account": select(OAuthAccount).filter(OAuthAccount.user_id == 1, OAuthAccount.provider == "github"),
+    "auth.get_user_oauth_account": select(OAuthAccount).filter(OAuthAccount.user_id == 1),
+    "auth.is_otp_locked": select(OTP).filter(OTP.email == "user@example.com", OTP.purpose == "registration",
+                                             OTP.locked_until.isnot(None), OTP.locked_until > NOW),
+    "auth.verify_and_delete_otp": select(OTP).filter(OTP.email == "user@example.com", OTP.purpose == "registration",
+                                                     OTP.expires_at >= NOW),
+    "auth.delete_expired_otps": text('SELECT ctid FROM "OTPs" WHERE expires_at < :now AND '
+                                     '(locked_until IS NULL OR locked_until < :now) LIMIT 1000').bindparams(now=NOW),
+    "auth.clear_blacklist": text('SELECT ctid FROM "Blacklist" WHERE blacklisted_at < :expiry LIMIT 1000').bindparams(expiry=NOW),
+    "auth.delete_stale_unverified_users": text("SELECT ctid FROM users WHERE is_verified = false AND created_at < :expiry "
+                                               "AND NOT EXISTS (SELECT 1 FROM oauth_accounts WHERE oauth_accounts.user_id = users.id) "
+                                               "LIMIT 1000").bindparams(expiry=NOW),
+    "auth.get_profile_id": select(Profile).filter(Profile.user_id == 1),
+    "workspace.get_workspace_id": select(Workspace).filter(Workspace.id == 1),
+    "workspace.get_workspace_code": select(Workspace).filter(Workspace.code == "ABCD1234"),
+    "workspace.get_user_workspace": select(Workspace).join(WorkspaceMember).filter(WorkspaceMember.user_id == 1),
+    "workspace.search_workspace": select(Workspace).join(WorkspaceMember).filter(WorkspaceMember.user_id == 1,
+                                                                               func.lower(Workspace.name) == func.lower("Team")),
+    "workspace.search_workspace_prefix": select(Workspace).filter(func.lower(Workspace.name).startswith("team", autoescape=True)),
+    "workspace.search_workspace_fuzzy": select(Workspace).filter(func.lower(Workspace.name).contains("team", autoescape=True)
+                                                                 | func.lower(Workspace.name).op("%")("team")
+                                                                 | func.lower(Workspace.description).contains("team", autoescape=True)),
+    "workspace.is_member": select(WorkspaceMember).filter(WorkspaceMember.workspace_id == 1, WorkspaceMember.user_id == 1),
+    "workspace.get_member_details": select(WorkspaceMember).filter(WorkspaceMember.workspace_id == 1),
+    "workspace.get_member_details_page": select(WorkspaceMember)
+                                         .filter(WorkspaceMember.workspace_id == 1,
+                                                 tuple_(WorkspaceMember.joined_at, WorkspaceMember.id) > tuple_(NOW, 1))
+                                         .order_by(WorkspaceMember.joined_at, WorkspaceMember.id).limit(51),
+    "outbox.claim_due": select(EmailOutbox).filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= NOW)
+                        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(50),
+}
+
+INVALID_INDEXES = text("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                       "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                       "WHERE n.nspname = current_schema() AND NOT i.indisvalid")
+
+def seq_scans(plan: dict) -> list:
+    found = [plan["Relation Name"]] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+def explain(db, statement) -> dict:
+    compiled = statement.compile(dialect=engine.dialect)
+    row = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    return row[0]["Plan"]
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN each CRUD hot-path query and fail if any of them needs a sequential scan")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the full plan of every query")
+    args = parser.parse_args()
+
+    failures = 0
+    db = SessionLocal()
+    try:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, statement in QUERIES.items():
+            plan = explain(db, statement)
+            scans = seq_scans(plan)
+            failures += bool(scans)
+            print(f"{'SEQ ' if scans else 'ok  '} {name:<36} {', '.join(scans) if scans else plan['Node Type']}")
+            if args.verbose:
+                print(f"      {plan}")
+        for (index,) in db.execute(INVALID_INDEXES):
+            failures += 1
+            print(f"INVALID index {index}: drop it and re-run alembic upgrade head")
+    finally:
+        db.rollback()
+        db.close()
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import fakeredis
+import fakeredis.aioredis
+import redis
+import redis.asyncio
+
+os.environ.update({
+    "JWT_SECRET_KEY": "test-secret-key-test-secret-key!", "JWT_ALGORITHM": "HS256",
+    "JWT_ACCESS_TOKEN_EXPIRE_DAYS": "1", "JWT_REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "DB_CONNECTION": "postgresql", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_DATABASE": "test",
+    "DB_USERNAME": "test", "DB_PASSWORD": "test",
+    "API_KEY": "test", "SMTP_HOST": "localhost", "SMTP_PORT": "25", "SMTP_USER": "test", "SMTP_PASSWORD": "test",
+    "FROM_EMAIL": "noreply@example.com",
+    "GITHUB_CLIENT_ID_WEB": "test", "GITHUB_CLIENT_SECRET_WEB": "test", "GITHUB_REDIRECT_URI_WEB": "http://localhost",
+    "GITHUB_CLIENT_ID_MOBILE": "test", "GITHUB_CLIENT_SECRET_MOBILE": "test", "GITHUB_REDIRECT_URI_MOBILE": "http://localhost",
+    "GOOGLE_CLIENT_ID": "test", "GOOGLE_CLIENT_SECRET": "test", "GOOGLE_REDIRECT_URI_WEB": "http://localhost",
+    "GOOGLE_REDIRECT_URI_MOBILE": "http://localhost", "FRONTEND_WEB_URL": "http://localhost", "FRONTEND_MOBILE_SCHEME": "test",
+    "REDIS_HOST": "localhost", "REDIS_PORT": "6379",
+    "AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test", "AWS_REGION": "us-east-1", "S3_BUCKET_NAME": "test",
+})
+
+server = fakeredis.FakeServer()
+
+class FakeRedis(fakeredis.FakeRedis):
+    def __init__(self, *args, **kwargs):
+        super().__init__(server=server, decode_responses=kwargs.get("decode_responses", False))
+
+class FakeAsyncRedis(fakeredis.aioredis.FakeRedis):
+    def __init__(self, *args, **kwargs):
+        super().__init__(server=server, decode_responses=kwargs.get("decode_responses", False))
+
+redis.Redis = FakeRedis
+redis.asyncio.Redis = FakeAsyncRedis
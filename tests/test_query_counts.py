@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.models import User
+from app.utils import JWTUtil
+from app.utils.cacheUtil import query_cache
+from app.utils.dbUtil import Base, get_db, get_read_db
+from app.utils.redisUtils import redis_client
+from app.workspace import crud, schemas
+
+MEMBERS = 5
+
+@pytest.fixture
+def env():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    redis_client.client.flushall()
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    db = Session()
+    users = [User(email=f"user{i}@example.com", password=None, username=f"user{i}", is_verified=True, is_active=True)
+             for i in range(MEMBERS)]
+    db.add_all(users)
+    db.commit()
+    workspace = crud.create_workspace(db, schemas.WorkspaceCreate.model_construct(name="Counted", code="QC12QC34",
+                                                                                  description=None), users[0].id)
+    for user in users[1:]:
+        crud.add_member(db, workspace, user)
+    db.close()
+    query_cache._local.clear()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def session():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_read_db] = session
+    app.dependency_overrides[JWTUtil.get_user] = lambda: users[0]
+    app.dependency_overrides[JWTUtil.token_claims] = lambda: {}
+    yield TestClient(app), workspace, statements
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+def count(statements, call):
+    statements.clear()
+    response = call()
+    assert response.status_code == 200, response.text
+    return response, len(statements)
+
+def test_workspace_detail_query_count(env):
+    client, workspace, statements = env
+    response, queries = count(statements, lambda: client.get(f"/api/workspace/detail/{workspace.name}/"))
+    assert len(response.json()["members"]) == MEMBERS
+    assert queries == 4
+
+def test_my_workspaces_query_count(env):
+    client, workspace, statements = env
+    response, queries = count(statements, lambda: client.get("/api/workspace/my/"))
+    assert [item["id"] for item in response.json()] == [workspace.id]
+    assert queries == 1
+
+def test_workspace_members_query_count(env):
+    client, workspace, statements = env
+    response, queries = count(statements, lambda: client.get(f"/api/workspace/members/{workspace.id}"))
+    assert len(response.json()) == MEMBERS
+    assert queries == 3